@@ -0,0 +1,147 @@
+"""Measure entry read latency before and during a flood of logins
+
+Run against a server started with `python3 manage.py runserver` (or any
+other server), using a token for an existing user:
+
+    python3 benchmarks/login_flood.py --token <token>
+
+Entry reads should stay close to the baseline while the flood runs, because
+logins beyond the hashing pool's capacity are turned away with 429. The
+flood runs in separate processes; when they share CPUs with the server,
+pass --flood-niceness so the load generator doesn't take the server's time.
+A flood from one address mostly measures the per-IP login limit; pass
+--source-addresses to measure the hashing pool's admission control.
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import statistics
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+
+def request(url, data=None, token=None, source_address=None):
+    """Send a request and return its status code, or 'error' if the connection failed"""
+    parts = urlsplit(url)
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Token {token}'
+    body = json.dumps(data).encode() if data is not None else None
+    connection = http.client.HTTPConnection(
+        parts.hostname, parts.port, timeout=30,
+        source_address=(source_address, 0) if source_address else None)
+    try:
+        connection.request('POST' if body is not None else 'GET', parts.path, body, headers)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    except (OSError, http.client.HTTPException):
+        return 'error'
+    finally:
+        connection.close()
+
+
+def measure_reads(base_url, token, seconds):
+    """Read /entries repeatedly and return the latencies in milliseconds"""
+    latencies = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        request(f'{base_url}/entries', token=token)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def flood_logins(base_url, stop, results, index, threads, niceness, source_addresses):
+    """Attempt logins with fresh usernames from several threads until told to stop
+
+    Runs in its own process so the flood doesn't hold the GIL the reads need.
+    """
+    os.nice(niceness)
+    statuses = Counter()
+    lock = threading.Lock()
+
+    def attempt_logins(thread_index):
+        source_address = None
+        if source_addresses:
+            # Spread threads over 127.0.0.2, 127.0.0.3, ... so per-IP limits
+            # don't turn the flood away before it reaches the hashing pool
+            source_address = f'127.0.0.{2 + (index * threads + thread_index) % source_addresses}'
+        attempt = 0
+        while not stop.is_set():
+            attempt += 1
+            data = {
+                'username': f'flood-{index}-{thread_index}-{attempt}@example.com',
+                'password': 'wrong-password'
+            }
+            code = request(f'{base_url}/login', data, source_address=source_address)
+            with lock:
+                statuses[code] += 1
+
+    workers = [threading.Thread(target=attempt_logins, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results.put(dict(statuses))
+
+
+def report(label, latencies):
+    """Print latency percentiles"""
+    if not latencies:
+        print(f'{label:>10}: no reads completed')
+        return
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f'{label:>10}: {len(latencies)} reads, '
+          f'p50 {statistics.median(latencies):.1f} ms, p95 {p95:.1f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--token', required=True, help='Auth token for entry reads')
+    parser.add_argument('--login-processes', type=int, default=4)
+    parser.add_argument('--login-threads', type=int, default=8,
+                        help='Login threads per process')
+    parser.add_argument('--seconds', type=int, default=10)
+    parser.add_argument('--source-addresses', type=int, default=0,
+                        help='Send the flood from this many loopback addresses instead of '
+                             'one, so it reaches the hashing pool past the per-IP limit '
+                             '(server on 127.0.0.1 only)')
+    parser.add_argument('--flood-niceness', type=int, default=0,
+                        help='Lower the flood processes\' CPU priority when they share '
+                             'cores with the server')
+    args = parser.parse_args()
+
+    report('baseline', measure_reads(args.url, args.token, args.seconds))
+
+    stop = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=flood_logins,
+            args=(args.url, stop, results, i, args.login_threads, args.flood_niceness,
+                  args.source_addresses))
+        for i in range(args.login_processes)
+    ]
+    for process in processes:
+        process.start()
+
+    report('flood', measure_reads(args.url, args.token, args.seconds))
+    stop.set()
+
+    statuses = Counter()
+    for _ in processes:
+        statuses.update(results.get())
+    for process in processes:
+        process.join()
+    print(f'login statuses during flood: {dict(statuses)}')
+
+
+if __name__ == '__main__':
+    main()
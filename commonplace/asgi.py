@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'commonplace.settings')
 
 application = get_asgi_application()
+
+# Imported after the app registry is ready
+from commonplaceapi.jobs import start_in_process_workers  # pylint: disable=wrong-import-position
+start_in_process_workers()
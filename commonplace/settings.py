@@ -52,9 +52,50 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
-    'PAGE_SIZE': 10
+    'PAGE_SIZE': 10,
+    # Use REMOTE_ADDR for throttling rather than a client-supplied X-Forwarded-For
+    'NUM_PROXIES': 0
 }
 
+# Password hashing pool and login/registration rate limits
+
+# Request threads per server process (e.g. gunicorn --threads). A login
+# waiting on the hashing pool holds one, so at most half are let in.
+SERVER_REQUEST_THREADS = int(os.environ.get('SERVER_REQUEST_THREADS', 8))
+PASSWORD_HASHING_WORKERS = 2
+PASSWORD_HASHING_MAX_IN_FLIGHT = max(PASSWORD_HASHING_WORKERS, SERVER_REQUEST_THREADS // 2)
+PASSWORD_HASHING_NICENESS = 10
+PASSWORD_HASHING_RETRY_AFTER = 1
+LOGIN_USERNAME_BURST = 5
+LOGIN_USERNAME_PER_MINUTE = 5
+LOGIN_IP_BURST = 20
+LOGIN_IP_PER_MINUTE = 60
+REGISTER_IP_BURST = 10
+REGISTER_IP_PER_MINUTE = 10
+
+# Background job queue
+# Set JOBS_IN_PROCESS_WORKERS to run workers inside the web server process
+# instead of (or as well as) `python manage.py runjobs`
+
+JOBS_IN_PROCESS_WORKERS = int(os.environ.get('JOBS_IN_PROCESS_WORKERS', 0))
+JOBS_POLL_SECONDS = 1
+JOBS_LEASE_SECONDS = 300
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_BASE_SECONDS = 5
+JOBS_RETRY_MAX_SECONDS = 600
+
+# Cached per-user topic lists
+
+TOPIC_CATALOG_CACHE_SECONDS = 300
+
+# Server-Sent Events stream at /events
+
+EVENTS_BUFFER_SIZE = 100
+EVENTS_HISTORY_SIZE = 200
+EVENTS_HISTORY_USERS = 1000
+EVENTS_HEARTBEAT_SECONDS = 15
+EVENTS_RETRY_MILLISECONDS = 3000
+
 CORS_ORIGIN_WHITELIST = (
     'http://localhost:3000',
     'http://127.0.0.1:3000'
@@ -17,7 +17,7 @@ from django.conf.urls import include
 from django.contrib import admin
 from rest_framework import routers
 from django.urls import path
-from commonplaceapi.views import register_user, login_user, EntryView, TopicView
+from commonplaceapi.views import register_user, login_user, batch, event_stream, user_stats, EntryView, TopicView
 
 
 router = routers.DefaultRouter(trailing_slash=False)
@@ -29,5 +29,8 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('register', register_user),
     path('login', login_user),
+    path('batch', batch),
+    path('events', event_stream),
+    path('stats', user_stats),
     path('api-auth', include('rest_framework.urls', namespace='rest_framework')),
 ]
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'commonplace.settings')
 
 application = get_wsgi_application()
+
+# Imported after the app registry is ready
+from commonplaceapi.jobs import start_in_process_workers  # pylint: disable=wrong-import-position
+start_in_process_workers()
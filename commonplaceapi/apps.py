@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CommonplaceapiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'commonplaceapi'
+
+    def ready(self):
+        # Register background job handlers
+        from commonplaceapi import stats  # pylint: disable=import-outside-toplevel,unused-import
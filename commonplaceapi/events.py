@@ -0,0 +1,157 @@
+"""In-process pub/sub for pushing entry/topic changes to connected clients
+
+Views publish after their transaction commits; the `/events` stream
+subscribes one bounded queue per connection. Everything lives in this
+process, so each server process only sees changes made through itself.
+Event ids are "<epoch>-<n>", where the epoch is new for every broker, so
+an id from before a restart is never mistaken for a current one.
+"""
+import asyncio
+import json
+import threading
+import uuid
+from collections import OrderedDict, defaultdict, deque
+from django.conf import settings
+from django.db import transaction
+
+
+class Event:
+    """A change notification for one user"""
+
+    def __init__(self, epoch, sequence, event_type, data):
+        self.sequence = sequence
+        self.id = f'{epoch}-{sequence}'
+        self.type = event_type
+        self.data = data
+
+    def encode(self):
+        """Format the event for a text/event-stream response"""
+        return f'id: {self.id}\nevent: {self.type}\ndata: {json.dumps(self.data)}\n\n'
+
+
+class Subscriber:
+    """One connected stream, fed on its own event loop"""
+
+    def __init__(self, user_id, loop, buffer_size):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(buffer_size)
+        self.overflowed = False
+
+    def put(self, event):
+        """Queue an event; runs on the subscriber's event loop"""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow to keep up; the stream closes and the client resumes
+            # from its Last-Event-ID
+            self.overflowed = True
+
+
+class UserHistory:
+    """A user's recent events, for clients resuming with Last-Event-ID"""
+
+    def __init__(self, size):
+        self.events = deque(maxlen=size)
+        # Sequence of the newest event that has fallen out of `events`
+        self.evicted_through = 0
+
+    def append(self, event):
+        """Record an event, dropping the oldest when full"""
+        if len(self.events) == self.events.maxlen:
+            self.evicted_through = self.events[0].sequence
+        self.events.append(event)
+
+
+class Broker:
+    """Fans events out to each user's subscribers and keeps recent history
+
+    History is kept for the `max_users` users who published most recently;
+    clients of users dropped from it get a reset when they resume.
+    """
+
+    def __init__(self, buffer_size, history_size, max_users):
+        self.buffer_size = buffer_size
+        self.history_size = history_size
+        self.max_users = max_users
+        self.epoch = uuid.uuid4().hex[:12]
+        self.lock = threading.Lock()
+        self.last_sequence = 0
+        self.subscribers = defaultdict(set)
+        self.histories = OrderedDict()
+
+    def publish(self, user_id, event_type, data):
+        """Send an event to every stream the user has open; safe from any thread"""
+        with self.lock:
+            self.last_sequence += 1
+            event = Event(self.epoch, self.last_sequence, event_type, data)
+
+            history = self.histories.pop(user_id, None) or UserHistory(self.history_size)
+            history.append(event)
+            self.histories[user_id] = history
+            if len(self.histories) > self.max_users:
+                self.histories.popitem(last=False)
+
+            subscribers = list(self.subscribers.get(user_id, ()))
+
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.put, event)
+            except RuntimeError:
+                # The subscriber's loop has closed
+                self.unsubscribe(subscriber)
+        return event
+
+    def recent(self, user_id):
+        """Get the user's events still held in history
+
+        Returns:
+            list -- Event instances, oldest first
+        """
+        with self.lock:
+            history = self.histories.get(user_id)
+            return list(history.events) if history is not None else []
+
+    def subscribe(self, user_id, last_event_id=None):
+        """Register a stream on the running event loop
+
+        Returns:
+            tuple -- the Subscriber and a list of events to replay first, or
+            None instead of the list if history since `last_event_id` is gone
+        """
+        subscriber = Subscriber(user_id, asyncio.get_running_loop(), self.buffer_size)
+        with self.lock:
+            self.subscribers[user_id].add(subscriber)
+
+            if last_event_id is None:
+                return subscriber, []
+
+            epoch, _, sequence = str(last_event_id).rpartition('-')
+            history = self.histories.get(user_id)
+            if (epoch != self.epoch or not sequence.isdigit() or history is None
+                    or int(sequence) > self.last_sequence
+                    or int(sequence) < history.evicted_through):
+                # Server restarted, or the client was away too long
+                return subscriber, None
+            backlog = [event for event in history.events if event.sequence > int(sequence)]
+        return subscriber, backlog
+
+    def unsubscribe(self, subscriber):
+        """Remove a stream"""
+        with self.lock:
+            subscribers = self.subscribers.get(subscriber.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self.subscribers[subscriber.user_id]
+
+
+broker = Broker(settings.EVENTS_BUFFER_SIZE, settings.EVENTS_HISTORY_SIZE,
+                settings.EVENTS_HISTORY_USERS)
+
+
+def publish_on_commit(user_id, event_type, data):
+    """Publish an event once the current transaction commits"""
+    transaction.on_commit(lambda: broker.publish(user_id, event_type, data))
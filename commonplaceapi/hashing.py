@@ -0,0 +1,85 @@
+"""Bounded worker pool for password hashing
+
+PBKDF2 is deliberately slow. Running it on a small dedicated pool caps how
+much CPU logins and registrations can take from ordinary requests, and the
+admission bound lets a burst be turned away immediately instead of piling
+up. A login waiting on the pool still holds its request thread, so the
+bound is kept below the server's request concurrency (see
+PASSWORD_HASHING_MAX_IN_FLIGHT); the remaining threads stay free for reads.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth import authenticate as django_authenticate
+from django.contrib.auth import hashers
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturated(Exception):
+    """Raised when the pool already has `max_in_flight` calls running or queued"""
+
+
+class HashingPool:
+    """A thread pool that rejects work beyond `max_in_flight` calls
+
+    Worker threads run at `niceness` on platforms that support per-thread
+    priorities, so hashing yields the CPU to request threads.
+    """
+
+    def __init__(self, workers, max_in_flight, niceness=0):
+        if max_in_flight < workers:
+            raise ValueError('max_in_flight must be at least the number of workers')
+        self.niceness = niceness
+        self.executor = ThreadPoolExecutor(
+            workers, thread_name_prefix='commonplace-hashing', initializer=self._lower_priority)
+        self.slots = threading.BoundedSemaphore(max_in_flight)
+
+    def _lower_priority(self):
+        if not self.niceness:
+            return
+        try:
+            # On Linux a thread's native id can be passed as a process id
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.niceness)
+        except (AttributeError, OSError) as ex:
+            logger.warning('Could not lower hashing thread priority: %r', ex)
+
+    def run(self, func, *args, **kwargs):
+        """Run `func(*args, **kwargs)` on the pool and wait for its result
+
+        Raises:
+            PoolSaturated -- if no slot is free
+        """
+        if not self.slots.acquire(blocking=False):
+            raise PoolSaturated()
+        try:
+            future = self.executor.submit(func, *args, **kwargs)
+        except Exception:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future.result()
+
+
+pool = HashingPool(settings.PASSWORD_HASHING_WORKERS, settings.PASSWORD_HASHING_MAX_IN_FLIGHT,
+                   settings.PASSWORD_HASHING_NICENESS)
+
+
+def make_password(password):
+    """Hash a new password on the pool"""
+    return pool.run(hashers.make_password, password)
+
+
+def authenticate(**credentials):
+    """Run `django.contrib.auth.authenticate` on the pool
+
+    Every configured authentication backend is tried and `user_login_failed`
+    is sent as usual. No request is passed, since the request object isn't
+    safe to use from another thread.
+
+    Returns:
+        User -- the authenticated user, or None
+    """
+    return pool.run(django_authenticate, None, **credentials)
@@ -0,0 +1,260 @@
+"""Database-backed job queue for work derived from entries and topics
+
+Views call `enqueue` inside the same `transaction.atomic()` block as the
+change that caused it, so the change and its job commit or roll back
+together. Workers (see the `runjobs`
+management command, or `start_in_process_workers`) claim jobs, run every
+handler registered for the job's kind and delete the job when it succeeds.
+"""
+import logging
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Count, Exists, Min, OuterRef, Q
+from django.utils import timezone
+from commonplaceapi.models import Job
+
+logger = logging.getLogger(__name__)
+
+ENTRY_CHANGED = 'entry_changed'
+# Keyed by CommonplaceUser id, for bulk changes to many of a user's entries
+USER_ENTRIES_CHANGED = 'user_entries_changed'
+
+_handlers = {}
+
+
+def handler(kind):
+    """Register a function to run for every job of the given kind
+
+    The function is called as `func(key, payload)`. Handlers should read the
+    current state from the database rather than trusting the payload, since
+    several edits may have been coalesced into one job.
+    """
+    def decorator(func):
+        _handlers.setdefault(kind, []).append(func)
+        return func
+    return decorator
+
+
+def enqueue(kind, key, **payload):
+    """Queue a job, unless an identical one is already waiting
+
+    Returns:
+        bool -- True if a new job row was created
+    """
+    try:
+        # Savepoint so a coalesced duplicate doesn't break the caller's transaction
+        with transaction.atomic():
+            Job.objects.create(kind=kind, key=str(key), payload=payload)
+        return True
+    except IntegrityError:
+        return False
+
+
+class LeaseLost(Exception):
+    """Raised when another worker has reclaimed a job this worker was running"""
+
+
+def claim_next():
+    """Claim the next runnable job
+
+    Pending jobs whose `run_after` has passed are eligible, as are running jobs
+    whose worker has held them longer than JOBS_LEASE_SECONDS. A job is never
+    claimed while another job with the same kind and key is running, since
+    handlers for one key must not run concurrently.
+
+    Returns:
+        Job -- the claimed job, or None if the queue is empty
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.JOBS_LEASE_SECONDS)
+    running_sibling = Exists(Job.objects.filter(
+        kind=OuterRef('kind'), key=OuterRef('key'), status=Job.RUNNING
+    ).exclude(pk=OuterRef('pk')))
+    candidates = Job.objects.filter(
+        Q(status=Job.PENDING, run_after__lte=now) |
+        Q(status=Job.RUNNING, started_on__lt=stale)
+    ).filter(~running_sibling).order_by('run_after')
+
+    for job in candidates[:10]:
+        # Compare-and-swap so two workers never claim the same job, and
+        # recheck for a sibling claimed since the candidates were read
+        claimed = Job.objects.filter(
+            pk=job.pk, status=job.status, started_on=job.started_on
+        ).filter(~running_sibling).update(status=Job.RUNNING, started_on=now)
+        if claimed:
+            job.status = Job.RUNNING
+            job.started_on = now
+            return job
+    return None
+
+
+def run_job(job):
+    """Run all handlers for a claimed job and record the outcome
+
+    Returns:
+        bool -- True if the job succeeded
+    """
+    try:
+        with transaction.atomic():
+            for func in _handlers.get(job.kind, []):
+                func(job.key, job.payload)
+
+            # Deleting the job only if this worker still holds its lease
+            # fences out a worker whose lease expired mid-run; its handler
+            # changes are rolled back with the transaction
+            deleted, _ = _held(job).delete()
+            if not deleted:
+                raise LeaseLost()
+    except LeaseLost:
+        logger.warning('Job %s %s:%s was reclaimed by another worker', job.pk, job.kind, job.key)
+        return False
+    except Exception as ex:
+        _retry_or_fail(job, ex)
+        return False
+    return True
+
+
+def _held(job):
+    """Select the job only while this worker's lease on it is current"""
+    return Job.objects.filter(pk=job.pk, status=Job.RUNNING, started_on=job.started_on)
+
+
+def _retry_or_fail(job, ex):
+    """Put a failed job back in the queue with exponential backoff"""
+    held = _held(job)
+    job.attempts += 1
+    job.last_error = repr(ex)
+    job.started_on = None
+
+    if job.attempts >= settings.JOBS_MAX_ATTEMPTS:
+        logger.error('Job %s %s:%s failed permanently: %r', job.pk, job.kind, job.key, ex)
+        job.status = Job.FAILED
+        held.update(status=job.status, attempts=job.attempts,
+                    last_error=job.last_error, started_on=None)
+        return
+
+    delay = min(settings.JOBS_RETRY_BASE_SECONDS * 2 ** (job.attempts - 1),
+                settings.JOBS_RETRY_MAX_SECONDS)
+    logger.warning('Job %s %s:%s failed, retrying in %ss: %r',
+                   job.pk, job.kind, job.key, delay, ex)
+    job.status = Job.PENDING
+    job.run_after = timezone.now() + timedelta(seconds=delay)
+    try:
+        with transaction.atomic():
+            held.update(status=job.status, attempts=job.attempts, last_error=job.last_error,
+                        run_after=job.run_after, started_on=None)
+    except IntegrityError:
+        # A newer job for the same key was queued while this one ran
+        held.delete()
+
+
+def run_pending(limit=None):
+    """Drain the queue on the current thread
+
+    Returns:
+        int -- number of jobs run, successful or not
+    """
+    count = 0
+    while limit is None or count < limit:
+        job = claim_next()
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
+
+
+def queue_depth():
+    """Report queue depth and the age of the oldest runnable job
+
+    Returns:
+        dict -- counts per status and `oldest_pending_seconds`
+    """
+    depth = {status: 0 for status, _ in Job.STATUS_CHOICES}
+    for row in Job.objects.values('status').annotate(count=Count('id')):
+        depth[row['status']] = row['count']
+
+    oldest = Job.objects.filter(status=Job.PENDING).aggregate(oldest=Min('created_on'))['oldest']
+    depth['oldest_pending_seconds'] = (
+        (timezone.now() - oldest).total_seconds() if oldest is not None else 0
+    )
+    return depth
+
+
+class WorkerPool:
+    """A set of threads that each drain the job queue in a loop"""
+
+    def __init__(self, size, poll_interval=None):
+        self.size = size
+        self.poll_interval = poll_interval or settings.JOBS_POLL_SECONDS
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.lock = threading.Lock()
+        self.succeeded = 0
+        self.failed = 0
+        self.latency_total = 0.0
+
+    def start(self):
+        """Start the worker threads"""
+        for i in range(self.size):
+            thread = threading.Thread(
+                target=self._work, name=f'commonplace-jobs-{i}', daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self, timeout=None):
+        """Ask the worker threads to exit and wait for them"""
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout)
+
+    def metrics(self):
+        """Report jobs run by this pool and their average enqueue-to-done latency
+
+        Returns:
+            dict -- succeeded, failed and avg_latency_seconds
+        """
+        with self.lock:
+            finished = self.succeeded + self.failed
+            return {
+                'succeeded': self.succeeded,
+                'failed': self.failed,
+                'avg_latency_seconds': self.latency_total / finished if finished else 0,
+            }
+
+    def _work(self):
+        while not self.stop_event.is_set():
+            close_old_connections()
+            try:
+                job = claim_next()
+                if job is None:
+                    self.stop_event.wait(self.poll_interval)
+                    continue
+                succeeded = run_job(job)
+            except Exception:
+                # Usually the database is unavailable; back off and try again
+                logger.exception('Job worker error')
+                self.stop_event.wait(self.poll_interval)
+                continue
+
+            latency = (timezone.now() - job.created_on).total_seconds()
+            with self.lock:
+                if succeeded:
+                    self.succeeded += 1
+                else:
+                    self.failed += 1
+                self.latency_total += latency
+
+
+_in_process_pool = None
+
+
+def start_in_process_workers():
+    """Start JOBS_IN_PROCESS_WORKERS threads inside the server process, once"""
+    global _in_process_pool  # pylint: disable=global-statement
+    if _in_process_pool is None and settings.JOBS_IN_PROCESS_WORKERS > 0:
+        _in_process_pool = WorkerPool(settings.JOBS_IN_PROCESS_WORKERS)
+        _in_process_pool.start()
+    return _in_process_pool
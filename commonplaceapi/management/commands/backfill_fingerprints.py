@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from commonplaceapi import simhash
+from commonplaceapi.models import Entry
+
+
+class Command(BaseCommand):
+    """Compute SimHash fingerprints for entries saved before they existed"""
+
+    help = 'Backfill near-duplicate fingerprints for existing entries in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of entries to update per query')
+
+    def handle(self, *args, **options):
+        fields = ['simhash'] + [f'simhash_band_{band}' for band in range(simhash.BANDS)]
+        last_id = 0
+        updated = 0
+
+        while True:
+            # Walk by primary key so entries without any text aren't fetched again
+            batch = list(
+                Entry.objects.filter(simhash__isnull=True, pk__gt=last_id)
+                .order_by('pk')
+                .only('id', 'title', 'body')[:options['batch_size']]
+            )
+            if not batch:
+                break
+
+            for entry in batch:
+                entry.set_fingerprint()
+            Entry.objects.bulk_update(batch, fields)
+
+            last_id = batch[-1].id
+            updated += len(batch)
+            self.stdout.write(f'Fingerprinted {updated} entries')
+
+        self.stdout.write(self.style.SUCCESS(f'Done, {updated} entries fingerprinted'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from commonplaceapi.models import CommonplaceUser
+from commonplaceapi.stats import rebuild_user_stats
+
+
+class Command(BaseCommand):
+    """Recompute the incrementally maintained statistics tables"""
+
+    help = 'Rebuild per-user entry statistics from the entries themselves'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append',
+                            help='Commonplace user id to rebuild (default: all users)')
+
+    def handle(self, *args, **options):
+        users = CommonplaceUser.objects.order_by('id')
+        if options['user']:
+            users = users.filter(pk__in=options['user'])
+
+        count = 0
+        for user in users.iterator():
+            rebuild_user_stats(user)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt statistics for {count} users'))
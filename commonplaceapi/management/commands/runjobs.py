@@ -0,0 +1,41 @@
+import time
+from django.core.management.base import BaseCommand
+from commonplaceapi import jobs
+
+
+class Command(BaseCommand):
+    """Run a pool of background job workers"""
+
+    help = 'Drain the commonplace job queue with a pool of worker threads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2,
+                            help='Number of worker threads')
+        parser.add_argument('--once', action='store_true',
+                            help='Run every runnable job once on this thread, then exit')
+        parser.add_argument('--stats', action='store_true',
+                            help='Print queue depth and exit')
+        parser.add_argument('--report-every', type=int, default=60,
+                            help='Seconds between metrics reports')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(str(jobs.queue_depth()))
+            return
+
+        if options['once']:
+            count = jobs.run_pending()
+            self.stdout.write(f'Ran {count} jobs')
+            return
+
+        pool = jobs.WorkerPool(options['workers'])
+        pool.start()
+        self.stdout.write(f'Started {options["workers"]} job workers')
+
+        try:
+            while True:
+                time.sleep(options['report_every'])
+                self.stdout.write(f'{pool.metrics()} {jobs.queue_depth()}')
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping job workers')
+            pool.stop()
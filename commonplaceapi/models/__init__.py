@@ -1,3 +1,5 @@
 from .commonplace_user import CommonplaceUser
 from .entry import Entry
-from .topic import Topic
\ No newline at end of file
+from .topic import Topic
+from .job import Job
+from .stats import UserStats, MonthlyEntryCount, DailyEntryCount, TopicEntryCount, EntryStatsSnapshot
\ No newline at end of file
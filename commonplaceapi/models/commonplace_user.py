@@ -8,3 +8,7 @@ class CommonplaceUser(models.Model):
     """Commonplace User, connected to auth_user table"""
 
     user = models.OneToOneField(User, on_delete=models.CASCADE)
+
+    # Replaced with a fresh random token whenever the user's topics change,
+    # so cached catalogs go stale. A counter could repeat after a rollback.
+    topic_catalog_version = models.CharField(max_length=32, default='', blank=True)
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Q
+from commonplaceapi import simhash
 from .commonplace_user import CommonplaceUser
 
 
@@ -9,3 +11,45 @@ class Entry(models.Model):
     title = models.CharField(max_length=500, null=True)
     body = models.TextField(null=True)
     created_on = models.DateTimeField(auto_now_add=True)
+
+    # SimHash of the body (or title), split into bands for indexed lookups
+    simhash = models.BigIntegerField(null=True)
+    simhash_band_0 = models.IntegerField(null=True)
+    simhash_band_1 = models.IntegerField(null=True)
+    simhash_band_2 = models.IntegerField(null=True)
+    simhash_band_3 = models.IntegerField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', f'simhash_band_{band}'])
+            for band in range(simhash.BANDS)
+        ]
+
+    def save(self, *args, **kwargs):
+        self.set_fingerprint()
+        super().save(*args, **kwargs)
+
+    def set_fingerprint(self):
+        """Compute the SimHash fields from the current text"""
+        self.simhash = simhash.fingerprint(self.body or self.title)
+        for band, value in enumerate(simhash.bands(self.simhash)):
+            setattr(self, f'simhash_band_{band}', value)
+
+    def near_duplicates(self):
+        """Find the same user's other entries with nearly the same text
+
+        Returns:
+            list -- Entry instances within simhash.MAX_DISTANCE bits
+        """
+        if self.simhash is None:
+            return []
+
+        same_band = Q()
+        for band, value in enumerate(simhash.bands(self.simhash)):
+            same_band |= Q(**{f'simhash_band_{band}': value})
+
+        candidates = Entry.objects.filter(same_band, user_id=self.user_id).exclude(pk=self.pk)
+        return [
+            candidate for candidate in candidates
+            if simhash.distance(candidate.simhash, self.simhash) <= simhash.MAX_DISTANCE
+        ]
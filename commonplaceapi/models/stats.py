@@ -0,0 +1,69 @@
+from django.db import models
+from .commonplace_user import CommonplaceUser
+from .topic import Topic
+
+
+class UserStats(models.Model):
+    """Running totals of a user's entries, kept up to date by background jobs"""
+
+    user = models.OneToOneField(CommonplaceUser, on_delete=models.CASCADE)
+    entry_count = models.IntegerField(default=0)
+    word_count = models.IntegerField(default=0)
+    last_entry_day = models.DateField(null=True)
+    current_streak = models.IntegerField(default=0)
+    longest_streak = models.IntegerField(default=0)
+
+
+class MonthlyEntryCount(models.Model):
+    """Number of entries a user created in a month"""
+
+    user = models.ForeignKey(CommonplaceUser, on_delete=models.CASCADE)
+    month = models.DateField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month'], name='unique_user_month'),
+        ]
+
+
+class DailyEntryCount(models.Model):
+    """Number of entries a user created on a day, used for writing streaks"""
+
+    user = models.ForeignKey(CommonplaceUser, on_delete=models.CASCADE)
+    day = models.DateField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'day'], name='unique_user_day'),
+        ]
+
+
+class TopicEntryCount(models.Model):
+    """Number of entries tagged with a topic"""
+
+    user = models.ForeignKey(CommonplaceUser, on_delete=models.CASCADE)
+    topic = models.ForeignKey(Topic, on_delete=models.CASCADE)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'topic'], name='unique_user_topic_count'),
+        ]
+
+
+class EntryStatsSnapshot(models.Model):
+    """What one entry last contributed to the totals, so changes can be undone"""
+
+    entry_id = models.BigIntegerField(unique=True)
+    user = models.ForeignKey(CommonplaceUser, on_delete=models.CASCADE)
+    title = models.CharField(max_length=500, null=True)
+    word_count = models.IntegerField()
+    day = models.DateField()
+    topic_ids = models.JSONField(default=list)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-word_count']),
+        ]
@@ -9,3 +9,8 @@ class Topic(models.Model):
     user = models.ForeignKey(CommonplaceUser, on_delete=models.SET_NULL, null=True)
     name = models.CharField(max_length=100)
     assign_to_entry = models.ManyToManyField(Entry, related_name='entry_topics')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'name'], name='unique_user_topic_name'),
+        ]
@@ -0,0 +1,57 @@
+"""SimHash fingerprints for finding near-duplicate entries
+
+Similar texts get fingerprints that differ in only a few bits. Each 64-bit
+fingerprint is split into BANDS bands; two fingerprints within
+MAX_DISTANCE bits of each other must share at least one band exactly, so
+candidates can be found with indexed equality lookups on the bands.
+"""
+import re
+from hashlib import blake2b
+
+BITS = 64
+BANDS = 4
+BAND_BITS = BITS // BANDS
+MAX_DISTANCE = BANDS - 1
+SHINGLE = 4
+
+WORD = re.compile(r'\w+')
+
+
+def fingerprint(text):
+    """Compute the SimHash of a text from overlapping character shingles
+
+    Case, punctuation and spacing are ignored, so the same quote pasted twice
+    gets the same fingerprint.
+
+    Returns:
+        int -- signed 64-bit fingerprint, or None for text without words
+    """
+    normalized = ' '.join(WORD.findall((text or '').lower()))
+    if not normalized:
+        return None
+
+    features = [normalized[i:i + SHINGLE]
+                for i in range(max(1, len(normalized) - SHINGLE + 1))]
+    weights = [0] * BITS
+    for feature in features:
+        value = int.from_bytes(blake2b(feature.encode(), digest_size=8).digest(), 'big')
+        for bit in range(BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+
+    value = sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+    # Store as signed so it fits a BigIntegerField
+    return value - (1 << BITS) if value >= 1 << (BITS - 1) else value
+
+
+def bands(value):
+    """Split a fingerprint into BANDS integers of BAND_BITS bits each"""
+    if value is None:
+        return [None] * BANDS
+    value &= (1 << BITS) - 1
+    mask = (1 << BAND_BITS) - 1
+    return [value >> (band * BAND_BITS) & mask for band in range(BANDS)]
+
+
+def distance(first, second):
+    """Count the bits that differ between two fingerprints"""
+    return bin((first ^ second) & ((1 << BITS) - 1)).count('1')
@@ -0,0 +1,188 @@
+"""Per-user entry statistics, maintained incrementally by background jobs
+
+Each entry's last counted contribution is kept in an EntryStatsSnapshot.
+When an entry changes, the job subtracts the old snapshot, adds the new
+one, and writes only the totals that actually moved. `rebuild_user_stats`
+recomputes everything from scratch for reconciliation.
+"""
+from collections import Counter
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from commonplaceapi import jobs
+from commonplaceapi.models import (
+    CommonplaceUser, DailyEntryCount, Entry, EntryStatsSnapshot, MonthlyEntryCount, Topic,
+    TopicEntryCount, UserStats,
+)
+
+
+class Deltas:
+    """Changes to a set of users' totals"""
+
+    def __init__(self):
+        self.entries = Counter()
+        self.words = Counter()
+        self.months = Counter()
+        self.days = Counter()
+        self.topics = Counter()
+
+    def add(self, values, sign):
+        """Add (sign=1) or remove (sign=-1) one entry's contribution"""
+        user_id = values['user_id']
+        self.entries[user_id] += sign
+        self.words[user_id] += sign * values['word_count']
+        self.months[(user_id, values['day'].replace(day=1))] += sign
+        self.days[(user_id, values['day'])] += sign
+        for topic_id in values['topic_ids']:
+            self.topics[(user_id, topic_id)] += sign
+
+
+def word_count(text):
+    """Count the words in an entry body"""
+    return len((text or '').split())
+
+
+def snapshot_values(entry, topic_ids):
+    """Describe what an entry contributes to its user's totals"""
+    return {
+        'user_id': entry.user_id,
+        'title': entry.title,
+        'word_count': word_count(entry.body),
+        'day': timezone.localdate(entry.created_on),
+        'topic_ids': sorted(topic_ids),
+    }
+
+
+@jobs.handler(jobs.ENTRY_CHANGED)
+def update_entry_stats(key, payload):
+    """Move one entry's contribution from its old snapshot to its current state"""
+    entry_id = int(key)
+    old = EntryStatsSnapshot.objects.filter(entry_id=entry_id).values(
+        'user_id', 'title', 'word_count', 'day', 'topic_ids').first()
+
+    entry = Entry.objects.filter(pk=entry_id, user__isnull=False).first()
+    new = None
+    if entry is not None:
+        new = snapshot_values(entry, entry.entry_topics.values_list('id', flat=True))
+
+    deltas = Deltas()
+    if old is not None:
+        deltas.add(old, -1)
+    if new is not None:
+        deltas.add(new, 1)
+    _apply(deltas)
+
+    if new is not None:
+        EntryStatsSnapshot.objects.update_or_create(entry_id=entry_id, defaults=new)
+    elif old is not None:
+        EntryStatsSnapshot.objects.filter(entry_id=entry_id).delete()
+
+
+@jobs.handler(jobs.USER_ENTRIES_CHANGED)
+def rebuild_changed_user_stats(key, payload):
+    """Recompute a user's statistics after a bulk change to their entries"""
+    user = CommonplaceUser.objects.filter(pk=int(key)).first()
+    if user is not None:
+        rebuild_user_stats(user)
+
+
+def _apply(deltas):
+    for user_id in set(deltas.entries) | set(deltas.words):
+        if deltas.entries[user_id] or deltas.words[user_id]:
+            UserStats.objects.get_or_create(user_id=user_id)
+            UserStats.objects.filter(user_id=user_id).update(
+                entry_count=F('entry_count') + deltas.entries[user_id],
+                word_count=F('word_count') + deltas.words[user_id],
+            )
+
+    for (user_id, month), delta in deltas.months.items():
+        _bump(MonthlyEntryCount, delta, user_id=user_id, month=month)
+
+    # Streaks only change when a day gains its first entry or loses its last
+    streak_users = set()
+    for (user_id, day), delta in deltas.days.items():
+        count = _bump(DailyEntryCount, delta, user_id=user_id, day=day)
+        if count is not None and (count == 0 or count == delta):
+            streak_users.add(user_id)
+    for user_id in streak_users:
+        _refresh_streaks(user_id)
+
+    existing_topics = set(Topic.objects.filter(
+        pk__in=[topic_id for _, topic_id in deltas.topics]).values_list('id', flat=True))
+    for (user_id, topic_id), delta in deltas.topics.items():
+        if topic_id in existing_topics:
+            _bump(TopicEntryCount, delta, user_id=user_id, topic_id=topic_id)
+
+
+def _bump(model, delta, **lookup):
+    """Add delta to a counter row, deleting it when it reaches zero
+
+    Returns:
+        int -- the new count, or None if delta was zero
+    """
+    if not delta:
+        return None
+
+    row, _ = model.objects.get_or_create(**lookup)
+    model.objects.filter(pk=row.pk).update(count=F('count') + delta)
+    row.refresh_from_db(fields=['count'])
+    if row.count <= 0:
+        row.delete()
+        return 0
+    return row.count
+
+
+def _refresh_streaks(user_id):
+    """Recompute a user's streaks from the days they wrote on"""
+    days = DailyEntryCount.objects.filter(
+        user_id=user_id, count__gt=0).order_by('day').values_list('day', flat=True)
+
+    last_day = None
+    run = longest = 0
+    for day in days:
+        run = run + 1 if last_day is not None and day - last_day == timedelta(days=1) else 1
+        longest = max(longest, run)
+        last_day = day
+
+    UserStats.objects.get_or_create(user_id=user_id)
+    UserStats.objects.filter(user_id=user_id).update(
+        last_entry_day=last_day, current_streak=run, longest_streak=longest)
+
+
+def rebuild_user_stats(user):
+    """Recompute all of a user's statistics from their entries"""
+    with transaction.atomic():
+        for model in (UserStats, MonthlyEntryCount, DailyEntryCount,
+                      TopicEntryCount, EntryStatsSnapshot):
+            model.objects.filter(user=user).delete()
+
+        topic_ids = {}
+        through = Entry.entry_topics.through.objects.filter(entry__user=user)
+        for entry_id, topic_id in through.values_list('entry_id', 'topic_id'):
+            topic_ids.setdefault(entry_id, []).append(topic_id)
+
+        deltas = Deltas()
+        snapshots = []
+        entries = Entry.objects.filter(user=user).only('id', 'user', 'title', 'body', 'created_on')
+        for entry in entries.iterator():
+            values = snapshot_values(entry, topic_ids.get(entry.id, []))
+            deltas.add(values, 1)
+            snapshots.append(EntryStatsSnapshot(entry_id=entry.id, **values))
+        EntryStatsSnapshot.objects.bulk_create(snapshots)
+
+        UserStats.objects.create(
+            user=user, entry_count=deltas.entries[user.id], word_count=deltas.words[user.id])
+        MonthlyEntryCount.objects.bulk_create([
+            MonthlyEntryCount(user=user, month=month, count=count)
+            for (_, month), count in deltas.months.items()
+        ])
+        DailyEntryCount.objects.bulk_create([
+            DailyEntryCount(user=user, day=day, count=count)
+            for (_, day), count in deltas.days.items()
+        ])
+        TopicEntryCount.objects.bulk_create([
+            TopicEntryCount(user=user, topic_id=topic_id, count=count)
+            for (_, topic_id), count in deltas.topics.items()
+        ])
+        _refresh_streaks(user.id)
@@ -0,0 +1,86 @@
+"""Token-bucket rate limiting for login and registration attempts"""
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+
+class TokenBucket:
+    """In-memory token buckets keyed by an arbitrary string
+
+    Each key holds up to `burst` tokens and regains `per_minute` tokens a
+    minute. Only the `max_keys` most recently used keys are remembered.
+    """
+
+    def __init__(self, burst, per_minute, max_keys=10000):
+        self.burst = burst
+        self.rate = per_minute / 60
+        self.max_keys = max_keys
+        self.lock = threading.Lock()
+        self.buckets = OrderedDict()
+
+    def consume(self, key):
+        """Take a token for the key
+
+        Returns:
+            float -- 0 if a token was taken, else seconds until one is available
+        """
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+            else:
+                wait = (1 - tokens) / self.rate
+
+            self.buckets[key] = (tokens, now)
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return wait
+
+    def reset(self):
+        """Forget every bucket"""
+        with self.lock:
+            self.buckets.clear()
+
+
+username_buckets = TokenBucket(settings.LOGIN_USERNAME_BURST, settings.LOGIN_USERNAME_PER_MINUTE)
+ip_buckets = TokenBucket(settings.LOGIN_IP_BURST, settings.LOGIN_IP_PER_MINUTE)
+register_ip_buckets = TokenBucket(settings.REGISTER_IP_BURST, settings.REGISTER_IP_PER_MINUTE)
+
+
+class LoginRateThrottle(BaseThrottle):
+    """Limit login attempts per client IP and per username"""
+
+    def __init__(self):
+        self.retry_after = None
+
+    def allow_request(self, request, view):
+        wait = ip_buckets.consume(self.get_ident(request))
+        if not wait:
+            username = str(request.data.get('username', '')).lower()
+            wait = username_buckets.consume(username)
+
+        self.retry_after = wait
+        return not wait
+
+    def wait(self):
+        return self.retry_after
+
+
+class RegisterRateThrottle(BaseThrottle):
+    """Limit registrations per client IP, so they can't crowd logins out of the hashing pool"""
+
+    def __init__(self):
+        self.retry_after = None
+
+    def allow_request(self, request, view):
+        self.retry_after = register_ip_buckets.consume(self.get_ident(request))
+        return not self.retry_after
+
+    def wait(self):
+        return self.retry_after
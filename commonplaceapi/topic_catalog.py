@@ -0,0 +1,87 @@
+"""Cached per-user topic lists and topic lookup by id or name
+
+Cache keys include CommonplaceUser.topic_catalog_version, which is set to
+a new random token in the same transaction as any topic change. Every
+server process sees the new version on its next request, so none can serve
+a stale catalog. Tokens are never reused, so a catalog cached inside a
+transaction that rolls back is never read again.
+"""
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from commonplaceapi import events
+from commonplaceapi.models import CommonplaceUser, Topic
+
+
+def topic_catalog(user):
+    """Get the user's topics, from the cache when possible
+
+    Returns:
+        list -- dicts with each topic's id and name
+    """
+    key = f'topic-catalog:{user.id}:{user.topic_catalog_version}'
+    catalog = cache.get(key)
+    if catalog is None:
+        catalog = list(Topic.objects.filter(user=user).order_by('id').values('id', 'name'))
+        cache.set(key, catalog, settings.TOPIC_CATALOG_CACHE_SECONDS)
+    return catalog
+
+
+def invalidate_topic_catalog(user):
+    """Mark the user's cached topic catalog as stale
+
+    Call inside the transaction that changes the topics.
+    """
+    user.topic_catalog_version = uuid.uuid4().hex
+    CommonplaceUser.objects.filter(pk=user.pk).update(
+        topic_catalog_version=user.topic_catalog_version)
+
+
+def resolve_topics(user, topic_ids=(), topic_names=()):
+    """Turn topic ids and names into the user's topic ids
+
+    Names that don't exist yet are created together in one statement.
+
+    Returns:
+        list -- topic ids
+
+    Raises:
+        ValidationError -- if ids or names aren't lists, a name isn't a
+        string, or an id isn't one of the user's topics
+    """
+    if not isinstance(topic_ids, (list, tuple)) or not isinstance(topic_names, (list, tuple)):
+        raise ValidationError('Topic ids and names must be lists')
+    try:
+        topic_ids = {int(topic_id) for topic_id in topic_ids}
+    except (TypeError, ValueError) as ex:
+        raise ValidationError('Topic ids must be integers') from ex
+
+    owned = set(Topic.objects.filter(user=user, pk__in=topic_ids).values_list('id', flat=True))
+    if owned != topic_ids:
+        raise ValidationError(f'Unknown topics: {sorted(topic_ids - owned)}')
+
+    if not all(isinstance(name, str) for name in topic_names):
+        raise ValidationError('Topic names must be strings')
+    names = {name.strip() for name in topic_names} - {''}
+    if not names:
+        return list(owned)
+    max_length = Topic._meta.get_field('name').max_length  # pylint: disable=protected-access
+    if any(len(name) > max_length for name in names):
+        raise ValidationError(f'Topic names can be at most {max_length} characters')
+
+    existing = dict(Topic.objects.filter(user=user, name__in=names).values_list('name', 'id'))
+    missing = names - set(existing)
+    if missing:
+        with transaction.atomic():
+            # ignore_conflicts covers a concurrent request creating the same name
+            Topic.objects.bulk_create(
+                [Topic(user=user, name=name) for name in missing], ignore_conflicts=True)
+            existing = dict(
+                Topic.objects.filter(user=user, name__in=names).values_list('name', 'id'))
+            invalidate_topic_catalog(user)
+        for name in missing:
+            events.publish_on_commit(user.user_id, 'topic.created', {'id': existing[name]})
+
+    return list(owned | set(existing.values()))
@@ -1,4 +1,7 @@
 from .auth import login_user
 from .auth import register_user
+from .batch import batch
 from .entry import EntryView
+from .events import event_stream
+from .stats import user_stats
 from .topic import TopicView
@@ -1,28 +1,37 @@
-from django.contrib.auth import authenticate
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from rest_framework.authtoken.models import Token
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from rest_framework.exceptions import Throttled
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
+from commonplaceapi import hashing
 from commonplaceapi.models import CommonplaceUser
+from commonplaceapi.throttling import LoginRateThrottle, RegisterRateThrottle
 
 User = get_user_model()
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([LoginRateThrottle])
 def login_user(request):
     '''Handles the authentication of a user
 
+    Attempts are rate limited per IP and username before any hashing, and
+    authentication itself runs on the bounded hashing pool.
+
     Method arguments:
       request -- The full HTTP request object
     '''
     username = request.data['username']
     password = request.data['password']
 
-    # Use the built-in authenticate method to verify
-    # authenticate returns the user object or None if no user is found
-    authenticated_user = authenticate(username=username, password=password)
+    # Use the built-in authenticate method to verify, on the hashing pool
+    try:
+        authenticated_user = hashing.authenticate(username=username, password=password)
+    except hashing.PoolSaturated as ex:
+        raise Throttled(wait=settings.PASSWORD_HASHING_RETRY_AFTER) from ex
 
     # If authentication was successful, respond with their token
     if authenticated_user is not None:
@@ -39,21 +48,31 @@ def login_user(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([RegisterRateThrottle])
 def register_user(request):
     '''Handles the creation of a new user for authentication
 
+    Registrations are rate limited per IP, since each one hashes a password
+    on the same pool that logins use.
+
     Method arguments:
       request -- The full HTTP request object
     '''
 
-    # Create a new user by invoking the `create_user` helper method
-    # on Django's built-in User model
-    new_user = User.objects.create_user(
-        username=request.data['username'],
-        password=request.data['password'],
+    # Hash the password on the bounded hashing pool
+    try:
+        password = hashing.make_password(request.data['password'])
+    except hashing.PoolSaturated as ex:
+        raise Throttled(wait=settings.PASSWORD_HASHING_RETRY_AFTER) from ex
+
+    # Create a new user the way `create_user` would, with the hash already made
+    new_user = User(
+        username=User.normalize_username(request.data['username']),
+        password=password,
         first_name=request.data['first_name'],
         last_name=request.data['last_name']
     )
+    new_user.save()
 
     # Now save the extra info in the commonplaceapi_commonplace_user table
     commonplace_user = CommonplaceUser.objects.create(
@@ -0,0 +1,185 @@
+"""View module for running several entry/topic operations in one request"""
+import json
+import re
+from io import BytesIO
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction
+from django.urls import Resolver404, resolve
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+MAX_OPERATIONS = 50
+
+# Routes a batch may call, by router basename
+ALLOWED_BASENAMES = ('entry', 'topic')
+
+# In a path, "$0.id" is the `id` field in the body of the first operation's
+# result. In a body, the same reference is written {"$ref": "0.id"} so that
+# ordinary text containing "$" is never rewritten.
+PATH_REFERENCE = re.compile(r'\$(\d+)((?:\.\w+)+)')
+BODY_REFERENCE = re.compile(r'(\d+)((?:\.\w+)+)')
+
+
+class BatchReferenceError(Exception):
+    """Raised when an operation refers to a result that doesn't exist"""
+
+
+class BatchRollback(Exception):
+    """Raised to roll back an atomic batch after a failed operation"""
+
+
+@api_view(['POST'])
+def batch(request):
+    '''Handles a list of entry/topic operations in one round trip
+
+    The body looks like:
+      {
+        "atomic": true,
+        "operations": [
+          {"method": "POST", "path": "/topics", "body": {"name": "poetry"}},
+          {"method": "POST", "path": "/entries",
+           "body": {"title": "...", "body": "...", "entry_topics": [{"$ref": "0.id"}]}},
+          {"method": "GET", "path": "/entries/$1.id"}
+        ]
+      }
+
+    Operations run in order as the authenticated user. "$<index>.<field>" in a
+    later path, or an object {"$ref": "<index>.<field>"} anywhere in a later
+    body, is replaced with that field from an earlier operation's response.
+    With "atomic", the first operation that fails rolls back the whole batch
+    and the rest are skipped.
+
+    Method arguments:
+      request -- The full HTTP request object
+    '''
+    if not isinstance(request.data, dict):
+        return Response({'reason': 'the body must be an object'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    operations = request.data.get('operations')
+    atomic = bool(request.data.get('atomic', False))
+
+    if not isinstance(operations, list) or not operations:
+        return Response({'reason': 'operations must be a non-empty list'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if len(operations) > MAX_OPERATIONS:
+        return Response({'reason': f'at most {MAX_OPERATIONS} operations are allowed'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    results = []
+    if not atomic:
+        for operation in operations:
+            results.append(_run_operation(request, operation, results))
+        return Response({'results': results})
+
+    try:
+        with transaction.atomic():
+            for operation in operations:
+                result = _run_operation(request, operation, results)
+                results.append(result)
+                if result['status'] >= 400:
+                    raise BatchRollback()
+    except BatchRollback:
+        # Everything up to and including the failed operation was rolled back
+        skipped = [{'status': status.HTTP_424_FAILED_DEPENDENCY, 'body': None}
+                   for _ in operations[len(results):]]
+        return Response({'results': results + skipped, 'committed': False},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({'results': results, 'committed': True})
+
+
+def _run_operation(request, operation, results):
+    """Dispatch one operation to the entry/topic views
+
+    Returns:
+        dict -- the operation's status code and response body
+    """
+    try:
+        method = str(operation.get('method', 'GET')).upper()
+        path = PATH_REFERENCE.sub(
+            lambda match: str(_lookup(match, results)), operation['path'])
+        body = _substitute(operation.get('body'), results)
+    except (AttributeError, KeyError, TypeError):
+        return _error(status.HTTP_400_BAD_REQUEST, 'operations need a method and path')
+    except BatchReferenceError as ex:
+        return _error(status.HTTP_400_BAD_REQUEST, str(ex))
+
+    path, _, query_string = path.partition('?')
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return _error(status.HTTP_404_NOT_FOUND, f'{path} not found')
+    if match.url_name is None or not match.url_name.startswith(
+            tuple(f'{basename}-' for basename in ALLOWED_BASENAMES)):
+        return _error(status.HTTP_400_BAD_REQUEST, f'{path} cannot be batched')
+
+    sub_request = _build_request(request, method, path, query_string, body)
+    try:
+        response = match.func(sub_request, *match.args, **match.kwargs)
+    except Exception as ex:
+        return _error(status.HTTP_500_INTERNAL_SERVER_ERROR, repr(ex))
+
+    if hasattr(response, 'data'):
+        response_body = response.data
+    else:
+        response_body = response.content.decode() or None
+    return {'status': response.status_code, 'body': response_body}
+
+
+def _build_request(request, method, path, query_string, body):
+    """Build a Django request for a sub-operation, reusing the batch's auth"""
+    content = json.dumps(body).encode() if body is not None else b''
+    environ = {
+        key: value for key, value in request.META.items()
+        if not key.startswith('wsgi.') and key not in ('CONTENT_TYPE', 'CONTENT_LENGTH')
+    }
+    environ.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query_string,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(content)),
+        'wsgi.input': BytesIO(content),
+        'wsgi.url_scheme': request.scheme,
+    })
+    sub_request = WSGIRequest(environ)
+
+    # Picked up by rest_framework's Request, so the token isn't looked up again
+    sub_request._force_auth_user = request.user  # pylint: disable=protected-access
+    sub_request._force_auth_token = request.auth  # pylint: disable=protected-access
+    return sub_request
+
+
+def _substitute(value, results):
+    """Replace {"$ref": "<index>.<field>"} objects with earlier results"""
+    if isinstance(value, dict):
+        if list(value) == ['$ref']:
+            match = BODY_REFERENCE.fullmatch(str(value['$ref']))
+            if match is None:
+                raise BatchReferenceError(f'{value["$ref"]} is not a valid reference')
+            # Keep the referenced value's type, e.g. an integer id
+            return _lookup(match, results)
+        return {key: _substitute(item, results) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_substitute(item, results) for item in value]
+    return value
+
+
+def _lookup(match, results):
+    index = int(match.group(1))
+    if index >= len(results):
+        raise BatchReferenceError(f'{match.group(0)} refers to a later operation')
+
+    value = results[index]['body']
+    for field in match.group(2).split('.')[1:]:
+        try:
+            value = value[field]
+        except (KeyError, TypeError) as ex:
+            raise BatchReferenceError(f'{match.group(0)} not found') from ex
+    return value
+
+
+def _error(status_code, reason):
+    return {'status': status_code, 'body': {'reason': reason}}
@@ -1,15 +1,25 @@
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.http import HttpResponseServerError
 from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework import serializers
 from commonplaceapi.models import Entry, CommonplaceUser, Topic
-from django.db.models import Q
+from commonplaceapi import events, jobs, simhash
+from commonplaceapi.topic_catalog import resolve_topics
+from django.db.models import Count, Q
 
 User = get_user_model()
 
+# Rows per INSERT when bulk-retag adds topic links
+BULK_BATCH_SIZE = 500
+
+# Keys a bulk request's "filter" may use, matching the list filters
+BULK_FILTER_KEYS = ('title', 'body', 'topic')
+
 
 class EntryView(ViewSet):
     """ Commonplace Entry Viewset"""
@@ -32,15 +42,34 @@ class EntryView(ViewSet):
         entry.user = user
 
         try:
-            # Save new entry
-            entry.save()
-
-            # Set entry_topics field equal to data entered by user
-            entry.entry_topics.set(request.data["entry_topics"])
+            # Save the entry, its topics and its job together so a failure
+            # part way through can't leave derived data out of date
+            with transaction.atomic():
+                # Resolve topic ids and names to the user's topics, creating new names
+                topic_ids = resolve_topics(
+                    user, request.data.get("entry_topics", []),
+                    request.data.get("topic_names", []))
+
+                # Save new entry
+                entry.save()
+
+                # Set entry_topics field equal to data entered by user
+                entry.entry_topics.set(topic_ids)
+
+                # Queue derived-data work instead of doing it in the request
+                jobs.enqueue(jobs.ENTRY_CHANGED, entry.id)
+            events.publish_on_commit(request.auth.user.id, 'entry.created', {'id': entry.id})
             
             # Determine which serializer to use and return 201 status
             serializer = EntrySerializer(entry, context={'request': request})
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            data = serializer.data
+
+            # Warn about existing entries with nearly the same text
+            data['possible_duplicates'] = [
+                {'id': duplicate.id, 'title': duplicate.title}
+                for duplicate in entry.near_duplicates()
+            ]
+            return Response(data, status=status.HTTP_201_CREATED)
         
         # Handle exceptions
         except ValidationError as ex:
@@ -80,13 +109,26 @@ class EntryView(ViewSet):
         # Set fields equal to new data entered by user
         entry.title = request.data["title"]
         entry.body = request.data["body"]
-        entry.entry_topics.set(request.data["entry_topics"])
 
         # Assign current user data to entry
         entry.user = user
 
-        # Save changes to entry
-        entry.save()
+        try:
+            with transaction.atomic():
+                # Resolve topic ids and names to the user's topics, creating new names
+                topic_ids = resolve_topics(
+                    user, request.data.get("entry_topics", []),
+                    request.data.get("topic_names", []))
+
+                # Save changes to entry
+                entry.save()
+                entry.entry_topics.set(topic_ids)
+
+                # Queue derived-data work for the changed entry
+                jobs.enqueue(jobs.ENTRY_CHANGED, entry.id)
+        except ValidationError as ex:
+            return Response({"reason": ex.message}, status=status.HTTP_400_BAD_REQUEST)
+        events.publish_on_commit(request.auth.user.id, 'entry.updated', {'id': entry.id})
 
         # Return 204
         return Response({}, status=status.HTTP_204_NO_CONTENT)
@@ -102,7 +144,11 @@ class EntryView(ViewSet):
             entry = Entry.objects.get(pk=pk)
 
             # Delete specified entry
-            entry.delete()
+            entry_id = entry.id
+            with transaction.atomic():
+                entry.delete()
+                jobs.enqueue(jobs.ENTRY_CHANGED, entry_id)
+            events.publish_on_commit(request.auth.user.id, 'entry.deleted', {'id': entry_id})
 
             # Return 204
             return Response({}, status=status.HTTP_204_NO_CONTENT)
@@ -148,6 +194,188 @@ class EntryView(ViewSet):
             entries, many=True, context={'request': request})
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def duplicates(self, request):
+        """Handle GET requests for groups of near-duplicate Entries
+
+        Returns:
+            Response -- JSON serialized list of lists of Entries
+        """
+
+        # Get user object of currently authenticated user
+        user = CommonplaceUser.objects.get(user=request.auth.user)
+        entries = Entry.objects.filter(user=user, simhash__isnull=False)
+
+        # Near duplicates share at least one band, so only entries in a band
+        # bucket with more than one member need to be compared
+        shared = Q()
+        for band in range(simhash.BANDS):
+            field = f'simhash_band_{band}'
+            buckets = entries.values(field).annotate(count=Count('id')).filter(count__gt=1)
+            shared |= Q(**{f'{field}__in': buckets.values(field)})
+        candidates = list(entries.filter(shared).order_by('id'))
+
+        # Compare within each bucket and merge matches into groups
+        parent = {entry.id: entry.id for entry in candidates}
+
+        def root(entry_id):
+            while parent[entry_id] != entry_id:
+                parent[entry_id] = parent[parent[entry_id]]
+                entry_id = parent[entry_id]
+            return entry_id
+
+        for band in range(simhash.BANDS):
+            buckets = {}
+            for entry in candidates:
+                buckets.setdefault(getattr(entry, f'simhash_band_{band}'), []).append(entry)
+            for bucket in buckets.values():
+                for i, first in enumerate(bucket):
+                    for second in bucket[i + 1:]:
+                        if simhash.distance(first.simhash, second.simhash) <= simhash.MAX_DISTANCE:
+                            parent[root(second.id)] = root(first.id)
+
+        groups = {}
+        for entry in candidates:
+            groups.setdefault(root(entry.id), []).append(entry)
+
+        duplicate_groups = [
+            EntrySerializer(group, many=True, context={'request': request}).data
+            for group in groups.values() if len(group) > 1
+        ]
+        return Response(duplicate_groups)
+
+    @action(detail=False, methods=['post'], url_path='bulk-delete')
+    def bulk_delete(self, request):
+        """Handle POST requests to delete many Entries at once
+
+        The body selects the current user's entries with "ids", a list of
+        entry ids, and/or "filter", an object with one or more of the
+        "title", "body" and "topic" keys matching the list filters. Every
+        entry is only selected with "all": true.
+
+        Returns:
+            Response -- JSON object with the number of entries deleted
+        """
+        user = CommonplaceUser.objects.get(user=request.auth.user)
+        try:
+            entries, topic_id = _selected_entries(user, request.data)
+        except ValidationError as ex:
+            return Response({"reason": ex.message}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Delete with a few set-based statements whatever the selection's
+        # size, skipping the per-row cascade collection of QuerySet.delete()
+        links = Entry.entry_topics.through.objects
+        with transaction.atomic():
+            deleted = entries.count()
+            if deleted and topic_id is None:
+                links.filter(entry__in=entries).delete()
+                entries._raw_delete(Entry.objects.db)  # pylint: disable=protected-access
+            elif deleted:
+                # Links to the filter topic select the entries, so they go
+                # last; foreign keys are checked at commit
+                links.filter(entry__in=entries).exclude(topic_id=topic_id).delete()
+                entries._raw_delete(Entry.objects.db)  # pylint: disable=protected-access
+                links.filter(topic_id=topic_id).exclude(
+                    entry_id__in=Entry.objects.values('id')).delete()
+
+            if deleted:
+                jobs.enqueue(jobs.USER_ENTRIES_CHANGED, user.id)
+                events.publish_on_commit(
+                    request.auth.user.id, 'entries.deleted', {'count': deleted})
+
+        return Response({"deleted": deleted})
+
+    @action(detail=False, methods=['post'], url_path='bulk-retag')
+    def bulk_retag(self, request):
+        """Handle POST requests to add and remove topics on many Entries
+
+        Entries are selected as in bulk-delete. "add" and "remove" are lists
+        of topic ids, and "add_names" lists topic names to add, creating any
+        that don't exist.
+
+        Returns:
+            Response -- JSON object with the number of entries selected
+        """
+        user = CommonplaceUser.objects.get(user=request.auth.user)
+        links = Entry.entry_topics.through
+        try:
+            with transaction.atomic():
+                entries, _ = _selected_entries(user, request.data)
+                add_ids = resolve_topics(
+                    user, request.data.get("add", []), request.data.get("add_names", []))
+                remove_ids = resolve_topics(user, request.data.get("remove", []))
+
+                # New links need each entry id; read them before removing
+                # links, which could change a topic filter's selection
+                entry_ids = list(entries.values_list('id', flat=True)) if add_ids else None
+                updated = len(entry_ids) if entry_ids is not None else entries.count()
+
+                if remove_ids:
+                    links.objects.filter(entry__in=entries, topic_id__in=remove_ids).delete()
+                if add_ids:
+                    # Links that already exist are skipped by the unique constraint
+                    links.objects.bulk_create([
+                        links(entry_id=entry_id, topic_id=topic_id)
+                        for entry_id in entry_ids for topic_id in add_ids
+                    ], batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+
+                if updated:
+                    jobs.enqueue(jobs.USER_ENTRIES_CHANGED, user.id)
+                    events.publish_on_commit(
+                        request.auth.user.id, 'entries.updated', {'count': updated})
+        except ValidationError as ex:
+            return Response({"reason": ex.message}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({"updated": updated})
+
+
+def _selected_entries(user, data):
+    """Get the user's entries chosen by a bulk request
+
+    Returns:
+        tuple -- a QuerySet of entries and the filter's topic id, or None
+
+    Raises:
+        ValidationError -- if nothing was selected, or the ids or filter
+        aren't well formed
+    """
+    ids = data.get("ids")
+    filters = data.get("filter")
+    select_all = data.get("all", False)
+    if select_all not in (True, False):
+        raise ValidationError('"all" must be true or false')
+    if ids is None and filters is None and not select_all:
+        raise ValidationError('Provide "ids", "filter" or "all": true to select entries')
+
+    entries = Entry.objects.filter(user=user)
+    topic_id = None
+    try:
+        if ids is not None:
+            if not isinstance(ids, list):
+                raise ValidationError('"ids" must be a list')
+            entries = entries.filter(pk__in=[int(entry_id) for entry_id in ids])
+        if filters is not None:
+            if not isinstance(filters, dict) or not filters:
+                raise ValidationError('"filter" must be an object with at least one key')
+            unknown = set(filters) - set(BULK_FILTER_KEYS)
+            if unknown:
+                raise ValidationError(f'Unknown filter keys: {sorted(unknown)}')
+            # An empty value would match every entry
+            if any(filters[key] in (None, '') for key in filters):
+                raise ValidationError('Filter values cannot be empty')
+            if any(not isinstance(filters.get(key, ''), str) for key in ('title', 'body')):
+                raise ValidationError('Title and body filters must be strings')
+            if "title" in filters:
+                entries = entries.filter(title__contains=filters["title"])
+            if "body" in filters:
+                entries = entries.filter(body__contains=filters["body"])
+            if "topic" in filters:
+                topic_id = int(filters["topic"])
+                entries = entries.filter(entry_topics=topic_id)
+    except (TypeError, ValueError) as ex:
+        raise ValidationError('Entry and topic ids must be integers') from ex
+    return entries, topic_id
+
 
 class UserSerializer(serializers.ModelSerializer):
     """JSON serializer for event organizer's related Django user"""
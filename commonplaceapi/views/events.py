@@ -0,0 +1,66 @@
+"""View module for streaming entry/topic changes with Server-Sent Events"""
+import asyncio
+from django.conf import settings
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from rest_framework.authtoken.models import Token
+from commonplaceapi.events import broker
+
+
+async def event_stream(request):
+    '''Streams the current user's entry and topic changes
+
+    Served as text/event-stream, so it needs an ASGI server. Browsers can't
+    set headers on an EventSource, so the token may also be passed as
+    `?token=`. A reconnecting client sends Last-Event-ID to receive what it
+    missed; if that history is gone it gets a `reset` event and should
+    refetch.
+
+    Method arguments:
+      request -- The full HTTP request object
+    '''
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    key = request.GET.get('token')
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Token '):
+        key = header[len('Token '):]
+
+    try:
+        token = await Token.objects.select_related('user').aget(key=key)
+    except Token.DoesNotExist:
+        return JsonResponse({'detail': 'Invalid token.'}, status=401)
+    if not token.user.is_active:
+        return JsonResponse({'detail': 'User inactive or deleted.'}, status=401)
+
+    last_event_id = request.headers.get('Last-Event-ID')
+
+    response = StreamingHttpResponse(
+        _stream(token.user.id, last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def _stream(user_id, last_event_id):
+    subscriber, backlog = broker.subscribe(user_id, last_event_id)
+    try:
+        yield f'retry: {settings.EVENTS_RETRY_MILLISECONDS}\n\n'
+
+        if backlog is None:
+            yield 'event: reset\ndata: {}\n\n'
+            backlog = []
+        for event in backlog:
+            yield event.encode()
+
+        while not subscriber.overflowed:
+            try:
+                event = await asyncio.wait_for(
+                    subscriber.queue.get(), settings.EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Comment line keeps proxies from closing an idle connection
+                yield ': keepalive\n\n'
+                continue
+            yield event.encode()
+    finally:
+        broker.unsubscribe(subscriber)
@@ -0,0 +1,56 @@
+"""View module for a user's writing statistics"""
+from datetime import timedelta
+from django.utils import timezone
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from commonplaceapi.models import (
+    CommonplaceUser, EntryStatsSnapshot, MonthlyEntryCount, TopicEntryCount, UserStats,
+)
+
+LONGEST_ENTRIES = 5
+
+
+@api_view(['GET'])
+def user_stats(request):
+    '''Handles GET requests for the current user's statistics
+
+    Reads the aggregate tables kept up to date by the job queue, so the cost
+    doesn't grow with the number of entries. Totals lag writes until the
+    entry_changed jobs have run.
+
+    Method arguments:
+      request -- The full HTTP request object
+    '''
+    # Get user object of currently authenticated user
+    user = CommonplaceUser.objects.get(user=request.auth.user)
+    stats = UserStats.objects.filter(user=user).first() or UserStats(user=user)
+
+    # A streak is still current if the user wrote today or yesterday
+    current_streak = 0
+    if stats.last_entry_day is not None and \
+            stats.last_entry_day >= timezone.localdate() - timedelta(days=1):
+        current_streak = stats.current_streak
+
+    months = MonthlyEntryCount.objects.filter(user=user).order_by('month')
+    topics = TopicEntryCount.objects.filter(user=user).select_related('topic').order_by('-count')
+    longest = EntryStatsSnapshot.objects.filter(user=user).order_by('-word_count')[:LONGEST_ENTRIES]
+
+    data = {
+        'entry_count': stats.entry_count,
+        'word_count': stats.word_count,
+        'current_streak': current_streak,
+        'longest_streak': stats.longest_streak,
+        'entries_per_month': [
+            {'month': month.month.strftime('%Y-%m'), 'count': month.count}
+            for month in months
+        ],
+        'entries_per_topic': [
+            {'id': topic.topic_id, 'name': topic.topic.name, 'count': topic.count}
+            for topic in topics
+        ],
+        'longest_entries': [
+            {'id': entry.entry_id, 'title': entry.title, 'word_count': entry.word_count}
+            for entry in longest
+        ],
+    }
+    return Response(data)
@@ -1,12 +1,16 @@
 """View module for handling requests about events"""
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from django.http import HttpResponseServerError
 from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework import serializers
-from commonplaceapi.models import Topic, CommonplaceUser, Entry
+from commonplaceapi.models import Topic, CommonplaceUser, Entry, TopicEntryCount
+from commonplaceapi import events, jobs
+from commonplaceapi.topic_catalog import invalidate_topic_catalog, topic_catalog
 
 User = get_user_model()
 
@@ -33,7 +37,10 @@ class TopicView(ViewSet):
         
         try:
             # Save new topic
-            topic.save()
+            with transaction.atomic():
+                topic.save()
+                invalidate_topic_catalog(user)
+            events.publish_on_commit(request.auth.user.id, 'topic.created', {'id': topic.id})
 
             # Determine which serializer to use and return 201 status
             serializer = TopicSerializer(topic, context={'request': request})
@@ -43,6 +50,11 @@ class TopicView(ViewSet):
         except ValidationError as ex:
             return Response({"reason": ex.message}, status=status.HTTP_400_BAD_REQUEST)
 
+        # Return 400 if the user already has a topic with this name
+        except IntegrityError:
+            return Response({"reason": "A topic with this name already exists"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
     def retrieve(self, request, pk=None):
         """Handle GET requests for single Topic
 
@@ -50,13 +62,17 @@ class TopicView(ViewSet):
             Response -- JSON serialized Entry instance
         """
         try:
-            # Get topic by id
-            topic = Topic.objects.get(pk=pk)
+            # Get the current user's topic by id
+            topic = Topic.objects.get(pk=pk, user__user=request.auth.user)
 
             # Determine which serializer to use and return requested topic
             serializer = TopicSerializer(topic, context={'request': request})
             return Response(serializer.data)
         
+        # Return 404 if topic does not exist
+        except Topic.DoesNotExist as ex:
+            return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
+
         # Handle exceptions
         except Exception as ex:
             return HttpResponseServerError(ex)
@@ -71,17 +87,24 @@ class TopicView(ViewSet):
         # Get user object of currently authenticated user
         user = CommonplaceUser.objects.get(user=request.auth.user)
         
-        # Get topic by id
-        topic = Topic.objects.get(pk=pk)
+        # Get the current user's topic by id
+        try:
+            topic = Topic.objects.get(pk=pk, user=user)
+        except Topic.DoesNotExist as ex:
+            return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
         
         # Set fields equal to new data entered by user
         topic.name = request.data["name"]
-        
-        # Assign current user data to topic
-        topic.user = user
 
         # Save changes to topic
-        topic.save()
+        try:
+            with transaction.atomic():
+                topic.save()
+                invalidate_topic_catalog(user)
+        except IntegrityError:
+            return Response({"reason": "A topic with this name already exists"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        events.publish_on_commit(request.auth.user.id, 'topic.updated', {'id': topic.id})
 
         # Return 204
         return Response({}, status=status.HTTP_204_NO_CONTENT)
@@ -94,11 +117,16 @@ class TopicView(ViewSet):
         """
         try:
 
-            # Get entry by id
-            topic = Topic.objects.get(pk=pk)
+            # Get the current user's topic by id
+            user = CommonplaceUser.objects.get(user=request.auth.user)
+            topic = Topic.objects.get(pk=pk, user=user)
 
-            # Delete specified entry
-            topic.delete()
+            # Delete specified topic
+            topic_id = topic.id
+            with transaction.atomic():
+                topic.delete()
+                invalidate_topic_catalog(user)
+            events.publish_on_commit(request.auth.user.id, 'topic.deleted', {'id': topic_id})
 
             # Return 204
             return Response({}, status=status.HTTP_204_NO_CONTENT)
@@ -117,13 +145,47 @@ class TopicView(ViewSet):
         Returns:
             Response -- JSON serialized list of Topics
         """
-        # Get all topics from the database
-        topics = Topic.objects.all()
+        # Get user object of currently authenticated user
+        user = CommonplaceUser.objects.get(user=request.auth.user)
+
+        # Return the user's topics from the cached catalog
+        return Response(topic_catalog(user))
+
+    @action(detail=False, methods=['post'], url_path='bulk-delete')
+    def bulk_delete(self, request):
+        """Handle POST requests to delete many Topics at once
+
+        The body's "ids" lists topic ids; ids of other users' topics are
+        ignored. Entries tagged with the topics are kept.
 
-        # Determine which serializer to use and return requested topics
-        serializer = TopicSerializer(
-            topics, many=True, context={'request': request})
-        return Response(serializer.data)
+        Returns:
+            Response -- JSON object with the number of topics deleted
+        """
+        user = CommonplaceUser.objects.get(user=request.auth.user)
+        ids = request.data.get("ids")
+        if not isinstance(ids, list):
+            return Response({"reason": '"ids" must be a list'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            topic_ids = list(Topic.objects.filter(user=user, pk__in=ids).values_list('id', flat=True))
+        except (TypeError, ValueError):
+            return Response({"reason": "Topic ids must be integers"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if topic_ids:
+            with transaction.atomic():
+                # Delete entry links and topic counts, then the topics, as
+                # set-based statements instead of collecting cascades per row
+                Entry.entry_topics.through.objects.filter(topic_id__in=topic_ids).delete()
+                TopicEntryCount.objects.filter(topic_id__in=topic_ids).delete()
+                Topic.objects.filter(pk__in=topic_ids)._raw_delete(Topic.objects.db)  # pylint: disable=protected-access
+
+                invalidate_topic_catalog(user)
+                jobs.enqueue(jobs.USER_ENTRIES_CHANGED, user.id)
+                events.publish_on_commit(
+                    request.auth.user.id, 'topics.deleted', {'ids': topic_ids})
+
+        return Response({"deleted": len(topic_ids)})
 
 
 class UserSerializer(serializers.ModelSerializer):
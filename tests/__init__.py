@@ -1 +1,9 @@
-from .entry_tests import EntryTests
\ No newline at end of file
+from .auth_tests import AuthTests
+from .batch_tests import BatchTests
+from .bulk_tests import BulkTests
+from .duplicate_tests import DuplicateTests
+from .entry_tests import EntryTests
+from .event_tests import EventTests
+from .job_tests import JobTests
+from .stats_tests import StatsTests
+from .topic_tests import TopicTests
\ No newline at end of file
@@ -0,0 +1,170 @@
+import json
+import threading
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_login_failed
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+from commonplaceapi import hashing, throttling
+
+User = get_user_model()
+
+
+class AuthTests(APITransactionTestCase):
+    """
+        Tests for login and registration
+
+        Authentication runs on the hashing pool's threads, which use their
+        own database connections, so test data has to be committed.
+    """
+
+    def setUp(self):
+        """
+        Create a new account and clear any rate limits
+        """
+        throttling.ip_buckets.reset()
+        throttling.username_buckets.reset()
+        throttling.register_ip_buckets.reset()
+
+        url = "/register"
+        data = {
+            "username": "email@gmail.com",
+            "password": "thisisapassword",
+            "first_name": "First Name",
+            "last_name": "Last Name"
+        }
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.token = json.loads(response.content)["token"]
+
+    def test_login(self):
+        """
+        Ensure a registered user can log in and a wrong password can't.
+        """
+        data = {"username": "email@gmail.com", "password": "thisisapassword"}
+        response = self.client.post("/login", data, format='json')
+        json_response = json.loads(response.content)
+        self.assertTrue(json_response["valid"])
+        self.assertEqual(json_response["token"], self.token)
+
+        data["password"] = "wrong"
+        response = self.client.post("/login", data, format='json')
+        self.assertFalse(json.loads(response.content)["valid"])
+
+        data["username"] = "nobody@gmail.com"
+        response = self.client.post("/login", data, format='json')
+        self.assertFalse(json.loads(response.content)["valid"])
+
+    def test_login_goes_through_authentication_backends(self):
+        """
+        Ensure failed logins send user_login_failed and inactive users can't log in.
+        """
+        failures = []
+
+        def record(sender, credentials, **kwargs):
+            failures.append(credentials["username"])
+
+        user_login_failed.connect(record)
+        try:
+            data = {"username": "email@gmail.com", "password": "wrong"}
+            self.client.post("/login", data, format='json')
+        finally:
+            user_login_failed.disconnect(record)
+        self.assertEqual(failures, ["email@gmail.com"])
+
+        User.objects.filter(username="email@gmail.com").update(is_active=False)
+        data = {"username": "email@gmail.com", "password": "thisisapassword"}
+        response = self.client.post("/login", data, format='json')
+        self.assertFalse(json.loads(response.content)["valid"])
+
+    def test_login_is_rate_limited_per_username(self):
+        """
+        Ensure repeated attempts on one username get 429 with Retry-After.
+        """
+        data = {"username": "email@gmail.com", "password": "wrong"}
+        with mock.patch.object(hashing, 'authenticate', return_value=None) as check:
+            for _ in range(5):
+                response = self.client.post("/login", data, format='json')
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            response = self.client.post("/login", data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertIn("Retry-After", response)
+
+            # The limiter runs before any hashing
+            self.assertEqual(check.call_count, 5)
+
+            # Other usernames are still allowed
+            data["username"] = "other@gmail.com"
+            response = self.client.post("/login", data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_register_is_rate_limited_per_ip(self):
+        """
+        Ensure a registration flood is turned away before it reaches the hashing pool.
+        """
+        with mock.patch.object(hashing, 'make_password', return_value='!') as make:
+            for i in range(20):
+                data = {
+                    "username": f"flood{i}@gmail.com",
+                    "password": "thisisapassword",
+                    "first_name": "First Name",
+                    "last_name": "Last Name"
+                }
+                response = self.client.post("/register", data, format='json')
+                if response.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+                    break
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertIn("Retry-After", response)
+
+            # setUp's registration used one token from the same bucket
+            self.assertEqual(make.call_count, i)
+
+        # Logins are still accepted
+        data = {"username": "email@gmail.com", "password": "thisisapassword"}
+        response = self.client.post("/login", data, format='json')
+        self.assertTrue(json.loads(response.content)["valid"])
+
+    def test_login_rejected_when_pool_is_full(self):
+        """
+        Ensure a saturated hashing pool turns logins away with 429.
+        """
+        data = {"username": "email@gmail.com", "password": "thisisapassword"}
+        with mock.patch.object(hashing.pool, 'run', side_effect=hashing.PoolSaturated):
+            response = self.client.post("/login", data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "1")
+
+    def test_hashing_pool_bounds_queue(self):
+        """
+        Ensure the pool rejects work beyond its in-flight limit.
+        """
+        pool = hashing.HashingPool(workers=1, max_in_flight=1)
+        started = threading.Event()
+        release = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        worker = threading.Thread(target=pool.run, args=(block,))
+        worker.start()
+        started.wait(5)
+
+        with self.assertRaises(hashing.PoolSaturated):
+            pool.run(lambda: None)
+
+        release.set()
+        worker.join(5)
+        self.assertEqual(pool.run(lambda: 42), 42)
+
+    def test_token_bucket_refills(self):
+        """
+        Ensure buckets refill over time.
+        """
+        bucket = throttling.TokenBucket(burst=1, per_minute=60)
+        with mock.patch.object(throttling.time, 'monotonic', return_value=100.0):
+            self.assertEqual(bucket.consume("key"), 0)
+            self.assertAlmostEqual(bucket.consume("key"), 1.0)
+        with mock.patch.object(throttling.time, 'monotonic', return_value=101.0):
+            self.assertEqual(bucket.consume("key"), 0)
@@ -0,0 +1,119 @@
+import json
+from rest_framework import status
+from rest_framework.test import APITestCase
+from commonplaceapi import throttling
+from commonplaceapi.models import Entry, Topic
+
+
+class BatchTests(APITestCase):
+    """
+        Tests for the batch endpoint
+    """
+
+    def setUp(self):
+        """
+        Create a new account and authenticate with it
+        """
+        throttling.register_ip_buckets.reset()
+        url = "/register"
+        data = {
+            "username": "email@gmail.com",
+            "password": "thisisapassword",
+            "first_name": "First Name",
+            "last_name": "Last Name"
+        }
+        response = self.client.post(url, data, format='json')
+        self.token = json.loads(response.content)["token"]
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+    def test_batch_with_references(self):
+        """
+        Ensure later operations can use ids created by earlier ones.
+        """
+        data = {
+            "operations": [
+                {"method": "POST", "path": "/topics", "body": {"name": "poetry"}},
+                {"method": "POST", "path": "/entries", "body": {
+                    "title": "This is a title",
+                    "body": "This is a body",
+                    "entry_topics": [{"$ref": "0.id"}]
+                }},
+                {"method": "GET", "path": "/entries/$1.id"}
+            ]
+        }
+        response = self.client.post("/batch", data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        results = json.loads(response.content)["results"]
+        self.assertEqual([result["status"] for result in results], [201, 201, 200])
+        self.assertEqual(results[2]["body"]["entry_topics"][0]["name"], "poetry")
+
+    def test_batch_leaves_dollar_amounts_alone(self):
+        """
+        Ensure text that looks like a reference is stored as written.
+        """
+        data = {
+            "operations": [
+                {"method": "POST", "path": "/entries", "body": {
+                    "title": "Receipt",
+                    "body": "It cost $0.99",
+                    "entry_topics": []
+                }}
+            ]
+        }
+        response = self.client.post("/batch", data, format='json')
+        results = json.loads(response.content)["results"]
+        self.assertEqual(results[0]["status"], status.HTTP_201_CREATED)
+        self.assertEqual(Entry.objects.get().body, "It cost $0.99")
+
+    def test_atomic_batch_rolls_back(self):
+        """
+        Ensure a failed operation in an atomic batch undoes the earlier ones.
+        """
+        data = {
+            "atomic": True,
+            "operations": [
+                {"method": "POST", "path": "/topics", "body": {"name": "poetry"}},
+                {"method": "POST", "path": "/entries", "body": {"title": "No body"}},
+                {"method": "GET", "path": "/topics"}
+            ]
+        }
+        response = self.client.post("/batch", data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        json_response = json.loads(response.content)
+        self.assertFalse(json_response["committed"])
+        self.assertEqual(
+            [result["status"] for result in json_response["results"]], [201, 500, 424])
+        self.assertEqual(Topic.objects.count(), 0)
+        self.assertEqual(Entry.objects.count(), 0)
+
+    def test_batch_rejects_other_routes(self):
+        """
+        Ensure only entry and topic routes can be batched.
+        """
+        data = {
+            "operations": [
+                {"method": "POST", "path": "/register", "body": {}},
+                {"method": "GET", "path": "/nowhere"},
+                {"method": "GET", "path": "/entries/$5.id"}
+            ]
+        }
+        response = self.client.post("/batch", data, format='json')
+        results = json.loads(response.content)["results"]
+        self.assertEqual([result["status"] for result in results], [400, 404, 400])
+
+    def test_batch_rejects_non_object_body(self):
+        """
+        Ensure a body that isn't an object gets 400, not 500.
+        """
+        response = self.client.post("/batch", [1, 2], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_requires_authentication(self):
+        """
+        Ensure the batch itself is authenticated.
+        """
+        self.client.credentials()
+        response = self.client.post("/batch", {"operations": []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,198 @@
+import json
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from commonplaceapi import jobs, throttling
+from commonplaceapi.models import CommonplaceUser, Entry, Topic, UserStats
+
+
+class BulkTests(APITestCase):
+    """
+        Tests for bulk delete and retag endpoints
+    """
+
+    def register(self, username):
+        """
+        Create an account and return its token
+        """
+        data = {
+            "username": username,
+            "password": "thisisapassword",
+            "first_name": "First Name",
+            "last_name": "Last Name"
+        }
+        response = self.client.post("/register", data, format='json')
+        return json.loads(response.content)["token"]
+
+    def setUp(self):
+        """
+        Create two accounts with topics and entries
+        """
+        throttling.register_ip_buckets.reset()
+        self.register("other@gmail.com")
+        self.token = self.register("email@gmail.com")
+        self.user = CommonplaceUser.objects.get(user__username="email@gmail.com")
+        other = CommonplaceUser.objects.get(user__username="other@gmail.com")
+
+        self.poetry = Topic.objects.create(name="poetry", user=self.user)
+        self.prose = Topic.objects.create(name="prose", user=self.user)
+        self.other_topic = Topic.objects.create(name="poetry", user=other)
+
+        self.entries = []
+        for title in ("first", "second", "third"):
+            entry = Entry.objects.create(user=self.user, title=title, body=f"{title} body")
+            entry.entry_topics.set([self.poetry.id])
+            self.entries.append(entry)
+        self.other_entry = Entry.objects.create(user=other, title="first", body="first body")
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+    def test_bulk_delete_by_ids(self):
+        """
+        Ensure only the current user's listed entries are deleted.
+        """
+        data = {"ids": [self.entries[0].id, self.entries[1].id, self.other_entry.id]}
+        response = self.client.post("/entries/bulk-delete", data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content), {"deleted": 2})
+
+        self.assertEqual(list(Entry.objects.filter(user=self.user)), [self.entries[2]])
+        self.assertTrue(Entry.objects.filter(pk=self.other_entry.id).exists())
+        self.assertEqual(Entry.entry_topics.through.objects.count(), 1)
+
+        jobs.run_pending()
+        self.assertEqual(UserStats.objects.get(user=self.user).entry_count, 1)
+
+    def test_bulk_delete_by_filter(self):
+        """
+        Ensure a filter selects from the current user's entries only.
+        """
+        response = self.client.post(
+            "/entries/bulk-delete", {"filter": {"title": "first"}}, format='json')
+        self.assertEqual(json.loads(response.content), {"deleted": 1})
+        self.assertTrue(Entry.objects.filter(pk=self.other_entry.id).exists())
+
+        response = self.client.post(
+            "/entries/bulk-delete", {"filter": {"topic": self.poetry.id}}, format='json')
+        self.assertEqual(json.loads(response.content), {"deleted": 2})
+        self.assertEqual(Entry.objects.filter(user=self.user).count(), 0)
+        self.assertEqual(Entry.entry_topics.through.objects.count(), 0)
+
+    def test_bulk_delete_requires_selection(self):
+        """
+        Ensure an empty body doesn't delete everything.
+        """
+        response = self.client.post("/entries/bulk-delete", {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Entry.objects.count(), 4)
+
+    def test_bulk_delete_rejects_filters_that_select_everything(self):
+        """
+        Ensure misspelled, empty or missing filter criteria get 400 instead
+        of matching every entry.
+        """
+        for data in ({"filter": {"titel": "first"}}, {"filter": {"title": ""}},
+                     {"filter": {}}, {"filter": {"topic": None}},
+                     {"filter": {"title": ["first"]}}, {"all": "yes"}):
+            response = self.client.post("/entries/bulk-delete", data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Entry.objects.count(), 4)
+
+    def test_bulk_delete_empty_selection(self):
+        """
+        Ensure selecting nothing deletes nothing and reports zero.
+        """
+        response = self.client.post("/entries/bulk-delete", {"ids": []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content), {"deleted": 0})
+        self.assertEqual(Entry.objects.count(), 4)
+
+    def test_bulk_delete_rejects_malformed_ids(self):
+        """
+        Ensure ids and topics that aren't integers get 400, not 500.
+        """
+        for data in ({"ids": ["abc"]}, {"filter": {"topic": "abc"}}, {"ids": "1"}):
+            response = self.client.post("/entries/bulk-delete", data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Entry.objects.count(), 4)
+
+    def test_bulk_retag(self):
+        """
+        Ensure topics are added and removed across the selected entries.
+        """
+        data = {
+            "ids": [self.entries[0].id, self.entries[1].id],
+            "add": [self.prose.id],
+            "add_names": ["fiction"],
+            "remove": [self.poetry.id]
+        }
+        response = self.client.post("/entries/bulk-retag", data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content), {"updated": 2})
+
+        for entry in self.entries[:2]:
+            self.assertEqual(sorted(entry.entry_topics.values_list('name', flat=True)),
+                             ["fiction", "prose"])
+        self.assertEqual(list(self.entries[2].entry_topics.values_list('name', flat=True)),
+                         ["poetry"])
+
+        # Adding again is a no-op rather than an error
+        response = self.client.post("/entries/bulk-retag", data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.entries[0].entry_topics.count(), 2)
+
+    def test_bulk_retag_by_topic_filter(self):
+        """
+        Ensure removing the filter's own topic still adds to every selected entry.
+        """
+        data = {
+            "filter": {"topic": self.poetry.id},
+            "add": [self.prose.id],
+            "remove": [self.poetry.id]
+        }
+        response = self.client.post("/entries/bulk-retag", data, format='json')
+        self.assertEqual(json.loads(response.content), {"updated": 3})
+        for entry in self.entries:
+            self.assertEqual(list(entry.entry_topics.values_list('name', flat=True)), ["prose"])
+
+    def test_bulk_retag_rejects_other_users_topics(self):
+        """
+        Ensure retagging can't use another user's topic.
+        """
+        data = {"ids": [self.entries[0].id], "add": [self.other_topic.id]}
+        response = self.client.post("/entries/bulk-retag", data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_delete_topics(self):
+        """
+        Ensure topics are deleted, their entries kept, and others' topics untouched.
+        """
+        data = {"ids": [self.poetry.id, self.other_topic.id]}
+        response = self.client.post("/topics/bulk-delete", data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content), {"deleted": 1})
+
+        self.assertFalse(Topic.objects.filter(pk=self.poetry.id).exists())
+        self.assertTrue(Topic.objects.filter(pk=self.other_topic.id).exists())
+        self.assertEqual(Entry.objects.count(), 4)
+        self.assertEqual(Entry.entry_topics.through.objects.count(), 0)
+
+    def test_bulk_delete_many_entries(self):
+        """
+        Ensure deleting thousands of entries takes a handful of statements.
+        """
+        Entry.objects.bulk_create([
+            Entry(user=self.user, title=f"title {i}", body="body") for i in range(2000)
+        ])
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                "/entries/bulk-delete", {"all": True}, format='json')
+        self.assertEqual(json.loads(response.content), {"deleted": 2003})
+        self.assertEqual(Entry.objects.filter(user=self.user).count(), 0)
+
+        # One topic link delete and one entry delete, whatever the size
+        deletes = [query for query in context.captured_queries
+                   if query["sql"].startswith("DELETE")]
+        self.assertEqual(len(deletes), 2)
@@ -0,0 +1,102 @@
+import json
+from io import StringIO
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APITestCase
+from commonplaceapi import simhash, throttling
+from commonplaceapi.models import CommonplaceUser, Entry
+
+QUOTE = "The unexamined life is not worth living, said Socrates at his trial."
+
+
+class DuplicateTests(APITestCase):
+    """
+        Tests for near-duplicate entry detection
+    """
+
+    def setUp(self):
+        """
+        Create a new account and authenticate with it
+        """
+        throttling.register_ip_buckets.reset()
+        url = "/register"
+        data = {
+            "username": "email@gmail.com",
+            "password": "thisisapassword",
+            "first_name": "First Name",
+            "last_name": "Last Name"
+        }
+        response = self.client.post(url, data, format='json')
+        self.token = json.loads(response.content)["token"]
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        self.user = CommonplaceUser.objects.get(user__username="email@gmail.com")
+
+    def create_entry(self, title, body):
+        """
+        Seed the database with an entry for the current user
+        """
+        entry = Entry()
+        entry.title = title
+        entry.body = body
+        entry.user = self.user
+        entry.save()
+        return entry
+
+    def test_fingerprint_ignores_case_and_punctuation(self):
+        """
+        Ensure the same quote pasted differently gets the same fingerprint.
+        """
+        first = simhash.fingerprint(QUOTE)
+        pasted = "  the UNEXAMINED life -- is not worth living said Socrates at his trial"
+        self.assertEqual(first, simhash.fingerprint(pasted))
+        self.assertGreater(simhash.distance(first, simhash.fingerprint("Call me Ishmael.")),
+                           simhash.MAX_DISTANCE)
+        self.assertIsNone(simhash.fingerprint("  ...  "))
+
+    def test_create_warns_about_duplicates(self):
+        """
+        Ensure creating an entry lists existing near duplicates.
+        """
+        existing = self.create_entry("Socrates", QUOTE)
+        self.create_entry("Ishmael", "Call me Ishmael.")
+
+        data = {
+            "title": "Apology",
+            "body": QUOTE.upper(),
+            "entry_topics": []
+        }
+        response = self.client.post("/entries", data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        json_response = json.loads(response.content)
+        self.assertEqual(json_response["possible_duplicates"],
+                         [{"id": existing.id, "title": "Socrates"}])
+
+    def test_list_duplicate_groups(self):
+        """
+        Ensure duplicates are grouped and unique entries left out.
+        """
+        first = self.create_entry("Socrates", QUOTE)
+        second = self.create_entry("Apology", QUOTE + "!")
+        self.create_entry("Ishmael", "Call me Ishmael.")
+
+        response = self.client.get("/entries/duplicates")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        groups = json.loads(response.content)
+        self.assertEqual([[entry["id"] for entry in group] for group in groups],
+                         [[first.id, second.id]])
+
+    def test_backfill_fingerprints(self):
+        """
+        Ensure the backfill command fingerprints existing entries.
+        """
+        entry = self.create_entry("Socrates", QUOTE)
+        self.create_entry("Empty", "")
+        Entry.objects.update(simhash=None, simhash_band_0=None)
+
+        call_command("backfill_fingerprints", batch_size=1, stdout=StringIO())
+
+        entry.refresh_from_db()
+        self.assertEqual(entry.simhash, simhash.fingerprint(QUOTE))
+        self.assertEqual(entry.simhash_band_0, simhash.bands(entry.simhash)[0])
@@ -1,6 +1,7 @@
 import json
 from rest_framework import status
 from rest_framework.test import APITestCase
+from commonplaceapi import throttling
 from commonplaceapi.models import Entry, Topic
 from commonplaceapi.models.commonplace_user import CommonplaceUser
 
@@ -15,6 +16,7 @@ class EntryTests(APITestCase):
         """
         Create a new account and create sample category
         """
+        throttling.register_ip_buckets.reset()
         url = "/register"
         data = {
             "username": "email@gmail.com",
@@ -34,9 +36,10 @@ class EntryTests(APITestCase):
         # Assert that a user was created
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
-        # Seed database with one topic
+        # Seed database with one topic owned by the new user
         topic = Topic()
         topic.name = "this is a topic"
+        topic.user = CommonplaceUser.objects.get(pk=1)
         topic.save()
 
     def test_create_entry(self):
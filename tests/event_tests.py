@@ -0,0 +1,172 @@
+import asyncio
+import json
+from django.test import AsyncClient
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from commonplaceapi import throttling
+from commonplaceapi.events import Broker, broker
+
+
+class EventTests(APITestCase):
+    """
+        Tests for the change event broker and stream
+    """
+
+    def setUp(self):
+        """
+        Create a new account and authenticate with it
+        """
+        throttling.register_ip_buckets.reset()
+        url = "/register"
+        data = {
+            "username": "email@gmail.com",
+            "password": "thisisapassword",
+            "first_name": "First Name",
+            "last_name": "Last Name"
+        }
+        response = self.client.post(url, data, format='json')
+        self.token = json.loads(response.content)["token"]
+        self.user_id = Token.objects.get(key=self.token).user_id
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+    def test_publish_reaches_only_that_users_subscribers(self):
+        """
+        Ensure events fan out per user.
+        """
+        test_broker = Broker(buffer_size=10, history_size=10, max_users=10)
+
+        async def scenario():
+            mine, _ = test_broker.subscribe(1)
+            theirs, _ = test_broker.subscribe(2)
+            test_broker.publish(1, 'entry.created', {'id': 5})
+            event = await asyncio.wait_for(mine.queue.get(), 1)
+            return event, theirs.queue.qsize()
+
+        event, other_queued = asyncio.run(scenario())
+        self.assertEqual(event.type, 'entry.created')
+        self.assertEqual(event.data, {'id': 5})
+        self.assertEqual(other_queued, 0)
+
+    def test_resume_from_last_event_id(self):
+        """
+        Ensure a reconnecting client gets what it missed, or a reset.
+        """
+        test_broker = Broker(buffer_size=10, history_size=2, max_users=10)
+        first = test_broker.publish(1, 'entry.created', {'id': 1})
+        test_broker.publish(1, 'entry.created', {'id': 2})
+
+        async def resume(last_event_id):
+            subscriber, backlog = test_broker.subscribe(1, last_event_id)
+            test_broker.unsubscribe(subscriber)
+            return backlog
+
+        backlog = asyncio.run(resume(first.id))
+        self.assertEqual([event.data['id'] for event in backlog], [2])
+
+        # History only holds two events, so the second one is gone
+        test_broker.publish(1, 'entry.created', {'id': 3})
+        test_broker.publish(1, 'entry.created', {'id': 4})
+        self.assertIsNone(asyncio.run(resume(first.id)))
+
+        # Ids from before a restart can't be resumed, even once the new
+        # process has published more events than the old id's number
+        old_process = Broker(buffer_size=10, history_size=2, max_users=10)
+        old_id = old_process.publish(1, 'entry.created', {'id': 5}).id
+        self.assertEqual(old_id.rpartition('-')[2], '1')
+        self.assertIsNone(asyncio.run(resume(old_id)))
+        self.assertIsNone(asyncio.run(resume('garbage')))
+
+    def test_history_is_kept_for_recent_users_only(self):
+        """
+        Ensure per-user history is bounded and dropped users resume with a reset.
+        """
+        test_broker = Broker(buffer_size=10, history_size=10, max_users=2)
+        first = test_broker.publish(1, 'entry.created', {'id': 1})
+        test_broker.publish(2, 'entry.created', {'id': 2})
+        test_broker.publish(3, 'entry.created', {'id': 3})
+
+        self.assertEqual(list(test_broker.histories), [2, 3])
+        self.assertEqual(test_broker.recent(1), [])
+
+        async def resume():
+            subscriber, backlog = test_broker.subscribe(1, first.id)
+            test_broker.unsubscribe(subscriber)
+            return backlog
+
+        self.assertIsNone(asyncio.run(resume()))
+        # Subscribing doesn't create history for the user
+        self.assertEqual(list(test_broker.histories), [2, 3])
+
+    def test_slow_subscriber_overflows(self):
+        """
+        Ensure a full buffer marks the subscriber instead of growing.
+        """
+        test_broker = Broker(buffer_size=1, history_size=10, max_users=10)
+
+        async def scenario():
+            subscriber, _ = test_broker.subscribe(1)
+            test_broker.publish(1, 'entry.created', {'id': 1})
+            test_broker.publish(1, 'entry.created', {'id': 2})
+            await asyncio.sleep(0)
+            return subscriber
+
+        subscriber = asyncio.run(scenario())
+        self.assertTrue(subscriber.overflowed)
+        self.assertEqual(subscriber.queue.qsize(), 1)
+
+    def test_entry_create_publishes_event(self):
+        """
+        Ensure creating an entry publishes after commit.
+        """
+        data = {
+            "title": "This is a title",
+            "body": "This is a body",
+            "entry_topics": []
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/entries", data, format='json')
+
+        user_id = response.wsgi_request.user.id
+        event = broker.recent(user_id)[-1]
+        self.assertEqual(event.type, 'entry.created')
+        self.assertEqual(event.data, {'id': json.loads(response.content)["id"]})
+
+    def test_stream_requires_token(self):
+        """
+        Ensure the stream rejects unknown tokens.
+        """
+        self.client.credentials()
+        response = self.client.get("/events?token=nope")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_stream_sends_events_and_resets(self):
+        """
+        Ensure an authenticated stream gets its retry hint, published events,
+        and a reset when resuming from a stale Last-Event-ID.
+        """
+        client = AsyncClient()
+        headers = {"Authorization": "Token " + self.token}
+        response = await client.get("/events", headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        stream = response.streaming_content
+        try:
+            self.assertEqual(await stream.__anext__(), b'retry: 3000\n\n')
+
+            # The stream subscribed before sending its first frame
+            event = broker.publish(self.user_id, 'entry.created', {'id': 7})
+            frame = await asyncio.wait_for(stream.__anext__(), 1)
+            self.assertEqual(frame.decode(), event.encode())
+        finally:
+            await stream.aclose()
+
+        headers["Last-Event-ID"] = "0123456789ab-1"
+        response = await client.get("/events", headers=headers)
+        stream = response.streaming_content
+        try:
+            await stream.__anext__()
+            self.assertEqual(await stream.__anext__(), b'event: reset\ndata: {}\n\n')
+        finally:
+            await stream.aclose()
@@ -0,0 +1,166 @@
+from datetime import timedelta
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from commonplaceapi import jobs, throttling
+from commonplaceapi.models import Entry, Job
+
+calls = []
+
+
+@jobs.handler('test_record')
+def record(key, payload):
+    """Record each call so tests can inspect it"""
+    calls.append((key, payload))
+
+
+@jobs.handler('test_fail')
+def fail(key, payload):
+    """Always fail"""
+    raise RuntimeError('boom')
+
+
+class JobTests(TestCase):
+    """
+        Tests for the background job queue
+    """
+
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_coalesces_pending_jobs(self):
+        """
+        Ensure repeated edits to one key produce one pending job.
+        """
+        self.assertTrue(jobs.enqueue('test_record', 1))
+        self.assertFalse(jobs.enqueue('test_record', 1))
+        self.assertTrue(jobs.enqueue('test_record', 2))
+        self.assertEqual(Job.objects.count(), 2)
+
+    def test_run_pending_runs_handlers_and_deletes_jobs(self):
+        """
+        Ensure draining the queue calls handlers once per job.
+        """
+        jobs.enqueue('test_record', 1, note='hello')
+        jobs.enqueue('test_record', 1)
+
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(calls, [('1', {'note': 'hello'})])
+        self.assertEqual(Job.objects.count(), 0)
+
+    def test_enqueue_while_running_queues_again(self):
+        """
+        Ensure an edit made while a job runs is not lost.
+        """
+        jobs.enqueue('test_record', 1)
+        job = jobs.claim_next()
+        self.assertTrue(jobs.enqueue('test_record', 1))
+
+        jobs.run_job(job)
+        self.assertEqual(Job.objects.filter(status=Job.PENDING).count(), 1)
+
+    def test_one_key_is_never_claimed_twice(self):
+        """
+        Ensure a job isn't claimed while another for the same key is running.
+        """
+        jobs.enqueue('test_record', 1)
+        running = jobs.claim_next()
+        jobs.enqueue('test_record', 1)
+        jobs.enqueue('test_record', 2)
+
+        # Only the other key is runnable until the first job finishes
+        other = jobs.claim_next()
+        self.assertEqual(other.key, '2')
+        self.assertIsNone(jobs.claim_next())
+
+        jobs.run_job(running)
+        self.assertEqual(jobs.claim_next().key, '1')
+
+    @override_settings(JOBS_LEASE_SECONDS=60)
+    def test_expired_lease_fences_out_first_worker(self):
+        """
+        Ensure a worker whose job was reclaimed can't commit its results.
+        """
+        jobs.enqueue('test_record', 1)
+        first = jobs.claim_next()
+        Job.objects.update(started_on=timezone.now() - timedelta(seconds=120))
+        first.started_on = Job.objects.get().started_on
+
+        second = jobs.claim_next()
+        self.assertEqual(second.pk, first.pk)
+
+        self.assertFalse(jobs.run_job(first))
+        self.assertEqual(Job.objects.get().status, Job.RUNNING)
+
+        self.assertTrue(jobs.run_job(second))
+        self.assertEqual(Job.objects.count(), 0)
+        self.assertEqual(len(calls), 2)
+
+    @override_settings(JOBS_MAX_ATTEMPTS=2, JOBS_RETRY_BASE_SECONDS=5)
+    def test_failed_job_retries_with_backoff(self):
+        """
+        Ensure failing jobs are retried later, then marked failed.
+        """
+        jobs.enqueue('test_fail', 1)
+        self.assertEqual(jobs.run_pending(), 1)
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIn('boom', job.last_error)
+
+        # Not runnable until the backoff has passed
+        self.assertEqual(jobs.run_pending(), 0)
+
+        Job.objects.update(run_after=timezone.now())
+        jobs.run_pending()
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(jobs.queue_depth()['failed'], 1)
+
+    def register(self):
+        """
+        Create an account and return its token
+        """
+        throttling.register_ip_buckets.reset()
+        response = self.client.post('/register', {
+            "username": "email@gmail.com",
+            "password": "thisisapassword",
+            "first_name": "First Name",
+            "last_name": "Last Name"
+        }, content_type='application/json')
+        return response.json()["token"]
+
+    def test_entry_writes_enqueue_jobs(self):
+        """
+        Ensure creating an entry queues derived-data work for it.
+        """
+        token = self.register()
+
+        response = self.client.post('/entries', {
+            "title": "This is a title",
+            "body": "This is a body",
+            "entry_topics": []
+        }, content_type='application/json', HTTP_AUTHORIZATION='Token ' + token)
+
+        job = Job.objects.get()
+        self.assertEqual(job.kind, jobs.ENTRY_CHANGED)
+        self.assertEqual(job.key, str(response.json()["id"]))
+
+    def test_entry_is_not_saved_without_its_job(self):
+        """
+        Ensure an entry and its job are committed together.
+        """
+        token = self.register()
+
+        with mock.patch.object(jobs.Job.objects, 'create', side_effect=RuntimeError('down')):
+            with self.assertRaises(RuntimeError):
+                self.client.post('/entries', {
+                    "title": "This is a title",
+                    "body": "This is a body",
+                    "entry_topics": []
+                }, content_type='application/json', HTTP_AUTHORIZATION='Token ' + token)
+
+        self.assertEqual(Entry.objects.count(), 0)
+        self.assertEqual(Job.objects.count(), 0)
@@ -0,0 +1,114 @@
+import json
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from commonplaceapi import jobs, throttling
+from commonplaceapi.models import CommonplaceUser, Entry, Topic, UserStats
+
+
+class StatsTests(APITestCase):
+    """
+        Tests for the per-user statistics endpoint
+    """
+
+    def setUp(self):
+        """
+        Create a new account and two topics
+        """
+        throttling.register_ip_buckets.reset()
+        url = "/register"
+        data = {
+            "username": "email@gmail.com",
+            "password": "thisisapassword",
+            "first_name": "First Name",
+            "last_name": "Last Name"
+        }
+        response = self.client.post(url, data, format='json')
+        self.token = json.loads(response.content)["token"]
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+        self.user = CommonplaceUser.objects.get(user__username="email@gmail.com")
+
+        self.poetry = Topic.objects.create(name="poetry", user=self.user)
+        self.prose = Topic.objects.create(name="prose", user=self.user)
+
+    def post_entry(self, body, topics):
+        """
+        Create an entry through the API
+        """
+        data = {"title": body[:10], "body": body, "entry_topics": topics}
+        response = self.client.post("/entries", data, format='json')
+        return json.loads(response.content)["id"]
+
+    def get_stats(self):
+        """
+        Run queued jobs, then fetch the stats
+        """
+        jobs.run_pending()
+        response = self.client.get("/stats")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json.loads(response.content)
+
+    def test_stats_follow_entry_writes(self):
+        """
+        Ensure creates, updates and deletes are reflected in the totals.
+        """
+        first = self.post_entry("one two three", [self.poetry.id])
+        self.post_entry("one two three four five", [self.poetry.id, self.prose.id])
+
+        stats = self.get_stats()
+        self.assertEqual(stats["entry_count"], 2)
+        self.assertEqual(stats["word_count"], 8)
+        self.assertEqual(stats["current_streak"], 1)
+        self.assertEqual(stats["entries_per_month"],
+                         [{"month": timezone.localdate().strftime('%Y-%m'), "count": 2}])
+        self.assertEqual(
+            {topic["name"]: topic["count"] for topic in stats["entries_per_topic"]},
+            {"poetry": 2, "prose": 1})
+        self.assertEqual([entry["word_count"] for entry in stats["longest_entries"]], [5, 3])
+
+        data = {"title": "one", "body": "one", "entry_topics": [self.prose.id]}
+        self.client.put(f"/entries/{first}", data, format='json')
+        stats = self.get_stats()
+        self.assertEqual(stats["entry_count"], 2)
+        self.assertEqual(stats["word_count"], 6)
+        self.assertEqual(
+            {topic["name"]: topic["count"] for topic in stats["entries_per_topic"]},
+            {"poetry": 1, "prose": 2})
+
+        self.client.delete(f"/entries/{first}")
+        stats = self.get_stats()
+        self.assertEqual(stats["entry_count"], 1)
+        self.assertEqual(stats["word_count"], 5)
+        self.assertEqual(stats["entries_per_month"][0]["count"], 1)
+
+    def test_rebuild_stats_and_streaks(self):
+        """
+        Ensure the rebuild command recomputes totals and streaks.
+        """
+        today = timezone.now()
+        for days_ago in (0, 1, 2, 5, 6):
+            entry = Entry.objects.create(user=self.user, title="title", body="a few words")
+            Entry.objects.filter(pk=entry.pk).update(created_on=today - timedelta(days=days_ago))
+
+        call_command("rebuild_stats", stdout=StringIO())
+
+        stats = self.get_stats()
+        self.assertEqual(stats["entry_count"], 5)
+        self.assertEqual(stats["word_count"], 15)
+        self.assertEqual(stats["current_streak"], 3)
+        self.assertEqual(stats["longest_streak"], 3)
+
+        # An old streak is no longer current
+        UserStats.objects.update(last_entry_day=timezone.localdate() - timedelta(days=3))
+        self.assertEqual(self.get_stats()["current_streak"], 0)
+
+    def test_stats_for_new_user(self):
+        """
+        Ensure a user without entries gets zeros.
+        """
+        stats = self.get_stats()
+        self.assertEqual(stats["entry_count"], 0)
+        self.assertEqual(stats["entries_per_topic"], [])
@@ -0,0 +1,173 @@
+import json
+from unittest import mock
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APITestCase
+from commonplaceapi import throttling
+from commonplaceapi.models import CommonplaceUser, Entry, Topic
+
+
+class TopicTests(APITestCase):
+    """
+        Tests for TopicView functions and per-user topic scoping
+    """
+
+    def register(self, username):
+        """
+        Create an account and return its token
+        """
+        data = {
+            "username": username,
+            "password": "thisisapassword",
+            "first_name": "First Name",
+            "last_name": "Last Name"
+        }
+        response = self.client.post("/register", data, format='json')
+        return json.loads(response.content)["token"]
+
+    def setUp(self):
+        """
+        Create two accounts, each with a topic
+        """
+        throttling.register_ip_buckets.reset()
+        # Ids repeat between tests, so start without cached catalogs
+        cache.clear()
+
+        self.other_token = self.register("other@gmail.com")
+        self.token = self.register("email@gmail.com")
+        self.user = CommonplaceUser.objects.get(user__username="email@gmail.com")
+        other = CommonplaceUser.objects.get(user__username="other@gmail.com")
+
+        self.topic = Topic.objects.create(name="poetry", user=self.user)
+        self.other_topic = Topic.objects.create(name="secret", user=other)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token)
+
+    def test_list_only_own_topics(self):
+        """
+        Ensure the topic list and lookups are scoped to the current user.
+        """
+        response = self.client.get("/topics")
+        self.assertEqual(json.loads(response.content), [{"id": self.topic.id, "name": "poetry"}])
+
+        response = self.client.get(f"/topics/{self.other_topic.id}")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.delete(f"/topics/{self.other_topic.id}")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(Topic.objects.filter(pk=self.other_topic.id).exists())
+
+    def test_catalog_is_cached_and_invalidated(self):
+        """
+        Ensure repeat lists hit the cache and changes show up immediately.
+        """
+        self.client.get("/topics")
+        with self.assertNumQueries(2):
+            # Token and CommonplaceUser lookups only
+            self.client.get("/topics")
+
+        response = self.client.post("/topics", {"name": "prose"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.get("/topics")
+        self.assertEqual([topic["name"] for topic in json.loads(response.content)],
+                         ["poetry", "prose"])
+
+        self.client.put(f"/topics/{self.topic.id}", {"name": "verse"}, format='json')
+        response = self.client.get("/topics")
+        self.assertEqual([topic["name"] for topic in json.loads(response.content)],
+                         ["verse", "prose"])
+
+    def test_topic_names_are_unique_per_user(self):
+        """
+        Ensure a user can't have two topics with the same name, but two users can.
+        """
+        response = self.client.post("/topics", {"name": "poetry"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post("/topics", {"name": "secret"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_create_entry_with_topic_names(self):
+        """
+        Ensure entries can name topics, reusing existing ones.
+        """
+        data = {
+            "title": "This is a title",
+            "body": "This is a body",
+            "topic_names": ["poetry", "new topic", "new topic "]
+        }
+        response = self.client.post("/entries", data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        json_response = json.loads(response.content)
+        self.assertEqual(sorted(topic["name"] for topic in json_response["entry_topics"]),
+                         ["new topic", "poetry"])
+        self.assertEqual(Topic.objects.filter(user=self.user).count(), 2)
+
+        response = self.client.get("/topics")
+        self.assertEqual(len(json.loads(response.content)), 2)
+
+    def test_entry_rejects_other_users_topics(self):
+        """
+        Ensure entries can't be tagged with another user's topic.
+        """
+        data = {
+            "title": "This is a title",
+            "body": "This is a body",
+            "entry_topics": [self.other_topic.id]
+        }
+        response = self.client.post("/entries", data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Entry.objects.count(), 0)
+
+    def test_topic_names_must_be_a_list(self):
+        """
+        Ensure a string isn't split into one topic per character, and only
+        strings are accepted as names.
+        """
+        data = {"title": "This is a title", "body": "This is a body", "topic_names": "poetry"}
+        response = self.client.post("/entries", data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        data = {"title": "This is a title", "body": "This is a body", "entry_topics": "1"}
+        response = self.client.post("/entries", data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Only strings are names; other values aren't turned into their repr
+        for names in ([{"a": 1}], [["poetry"]], [7]):
+            data = {"title": "This is a title", "body": "This is a body", "topic_names": names}
+            response = self.client.post("/entries", data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.assertEqual(Topic.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(Entry.objects.count(), 0)
+
+    def test_failed_entry_save_keeps_no_new_topics(self):
+        """
+        Ensure topics named by an entry that fails to save are rolled back.
+        """
+        data = {"title": "This is a title", "body": "This is a body", "topic_names": ["orphan"]}
+        with mock.patch.object(Entry, 'save', side_effect=RuntimeError('down')):
+            with self.assertRaises(RuntimeError):
+                self.client.post("/entries", data, format='json')
+        self.assertFalse(Topic.objects.filter(name="orphan").exists())
+
+    def test_rolled_back_topic_never_listed(self):
+        """
+        Ensure a catalog cached inside a rolled-back batch isn't served later.
+        """
+        data = {
+            "atomic": True,
+            "operations": [
+                {"method": "POST", "path": "/topics", "body": {"name": "ghost"}},
+                {"method": "GET", "path": "/topics"},
+                {"method": "GET", "path": "/topics/0"}
+            ]
+        }
+        response = self.client.post("/batch", data, format='json')
+        self.assertFalse(json.loads(response.content)["committed"])
+
+        self.client.post("/topics", {"name": "real"}, format='json')
+        response = self.client.get("/topics")
+        self.assertEqual([topic["name"] for topic in json.loads(response.content)],
+                         ["poetry", "real"])